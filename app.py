@@ -1,30 +1,178 @@
-from flask import Flask, render_template, request
-import best_players
-import best_teams
-import shots_map
+import gzip
+import os
+import re
+import subprocess
+import sys
+import threading
+from flask import Flask, render_template, request, jsonify, url_for, abort
+import render_cache
+import render_options
+import render_service
+import prewarm
+from page_options import (COLUMNS, ORDER_VAR, ORDER_VAR_G, SEASON_VAR, STAGE_VAR, POS_VAR, FORMAT_VAR,
+                          GRAPHIC_VAR, MAP_TYPE_VAR_HEAT, GRAPHIC_TASKS, TEAM_VAR)
 
+# Модули отрисовки (pandas, matplotlib, датасеты) здесь не импортируются: веб-процесс
+# только ставит задачи в пул render_service, а модули подгружаются фоновым прогревом
+# или при первой задаче. Готовность всего этого показывает /ready.
 app = Flask(__name__)
+_warm_up_lock = threading.Lock()
+_warm_up = None
+
+
+def start_warm_up():
+    """
+    Запускает фоновую подготовку отрисовки (см. render_service.start), если она ещё не идёт.
+    Если подготовка упала, следующий вызов (следующий запрос) запускает её заново.
+    """
+    global _warm_up
+    with _warm_up_lock:
+        if _warm_up is None:
+            _warm_up = threading.Thread(target=_run_warm_up, name='warm-up', daemon=True)
+            _warm_up.start()
+
+
+def _run_warm_up():
+    global _warm_up
+    try:
+        render_service.start()
+    except Exception:
+        # Без этого поток умер бы молча, а /ready навсегда отвечал бы 503 без причины в логе
+        app.logger.exception('подготовка отрисовки не удалась, повтор при следующем запросе')
+        with _warm_up_lock:
+            _warm_up = None
+
+
+@app.before_request
+def ensure_warm_up():
+    # Под gunicorn/flask run нет __main__: прогрев стартует с первым запросом (например, пробой /ready)
+    start_warm_up()
+
+
+@app.route('/ready')
+def ready():
+    if render_service.ready():
+        return jsonify({'ready': True})
+    return jsonify({'ready': False}), 503
+
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
-#для странички best_teams
-COLUMNS = ['Команда','Общий рейтинг (Net)','Атакующий рейтинг (Off)','Защитный рейтинг (Def)','Заброшенные шайбы (ЗШ)','Пропущенный шайбы (ПШ)','Разница шайб (РШ)','Ожидаемые шайбы (xG)','Ожидаемые пропущенные шайбы (xGA)','Ожидаемая разница шайб (xGD)','Шансы на плей-офф']
-ORDER_VAR = ['По возрастанию','По убыванию']
-#для странички best_goalies
-ORDER_VAR_G = ['10 лучших вратарей по GSAx','10 худших вратарей по GSAx']
-#для странички shot_map
-SEASON_VAR = ['2024','2025','2026','All']
-STAGE_VAR = ['regular season', 'All']
-POS_VAR = ['нападающие','защитники','All']
-FORMAT_VAR = ['EV','PP','PK','All']
-GRAPHIC_VAR = ['Тепловая карта','Точечное распределение']
-MAP_TYPE_VAR_POINTS = ['Броски','Голы','xG']
-MAP_TYPE_VAR_HEAT = ['Броски','Голы']
-TEAM_VAR = ['All', 'Авангард', 'Автомобилист', 'Адмирал', 'Ак Барс', 'Амур', 'Барыс', 'Динамо М', 'Динамо Мн', 'Лада', 'Локомотив', 'Металлург', 'Нефтехимик', 'Салават Юлаев', 'Северсталь', 'Сибирь', 'Трактор', 'ЦСКА', 'Шанхайские Драконы', 'СКА', 'Спартак', 'Торпедо', 'ХК Сочи']
 
+def image_url(key):
+    return url_for('render_result', key=key)
+
+
+# Ключ картинки зависит от фильтров и содержимого исходных CSV, поэтому
+# по одному адресу всегда лежит одна и та же картинка и её можно кэшировать надолго
+IMAGE_MAX_AGE = 365 * 24 * 3600
+
+
+def check_key(key):
+    # id задачи — sha1 из render_cache с расширением формата
+    if not re.fullmatch(r'[0-9a-f]{40}\.(%s)' % '|'.join(render_options.FORMATS), key):
+        abort(404)
+
+
+@app.route('/render/<key>/status')
+def render_status(key):
+    check_key(key)
+    return jsonify({'id': key, 'status': render_service.status(key), 'error': render_service.error(key)})
+
+
+@app.route('/render/<key>')
+def render_result(key):
+    check_key(key)
+    # ETag — ключ картинки: браузер или прокси с этой картинкой получает 304 без ожидания отрисовки
+    if key in request.if_none_match:
+        return image_response(key, status=304)
+    # Страница уже отдана, здесь ждём окончания отрисовки в пуле процессов
+    state = render_service.wait(key)
+    data = render_cache.get_bytes(key) if state == 'done' else None
+    if data is not None:
+        return image_response(key, data)
+    if state == 'pending':
+        return jsonify({'id': key, 'status': state}), 202
+    return jsonify({'id': key, 'status': state, 'error': render_service.error(key)}), 404 if state == 'unknown' else 500
+
+
+def image_response(key, data=None, status=200):
+    response = app.response_class(data, status=status, mimetype=render_options.mimetype(key.rsplit('.', 1)[1]))
+    response.set_etag(key)
+    response.cache_control.public = True
+    response.cache_control.max_age = IMAGE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+
+@app.route('/cache_stats')
+def cache_stats():
+    return jsonify(render_cache.get_stats())
+
+
+@app.route('/api/shots')
+def api_shots():
+    # Броски под фильтры /shots для отрисовки на клиенте (формат ответа — в shots_api.py).
+    # Модуль и датасет бросков грузятся в веб-процессе только при первом запросе данных
+    import shots_api
+
+    try:
+        filters, offset, limit, encoding = shots_api.parse(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    body, etag, header = shots_api.page(filters, offset, limit, encoding)
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+    elif 'gzip' in request.accept_encodings:
+        response = app.response_class(body, mimetype=shots_api.ENCODINGS[encoding])
+        response.content_encoding = 'gzip'
+    else:
+        response = app.response_class(gzip.decompress(body), mimetype=shots_api.ENCODINGS[encoding])
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    # Данные меняются с новыми играми: клиент перепроверяет их по ETag
+    response.cache_control.no_cache = True
+    response.headers['X-Total-Count'] = header['total']
+    if header['next'] is not None:
+        response.headers['X-Next-Offset'] = header['next']
+    return response
+
+
+@app.route('/api/players')
+def api_players():
+    # Подсказки для поля player на /shots: ?q=начало имени&team=...&season=...&limit=...
+    # (team и season — можно несколько через запятую)
+    import player_search
+    import shots_data
+
+    try:
+        limit = min(int(request.args.get('limit') or player_search.DEFAULT_LIMIT), 100)
+    except ValueError:
+        return jsonify({'error': 'limit должен быть целым числом'}), 400
+    players = player_search.search(shots_data.source().data['players'], request.args.get('q', ''),
+                                   team=request.args.get('team', '').split(','),
+                                   season=request.args.get('season', '').split(','), limit=limit)
+    return jsonify({'query': request.args.get('q', ''), 'players': players})
+
+
+@app.route('/api/stats')
+def api_stats():
+    # Сводки по кубу бросков (см. shots_stats.py): ?by=player&team=...&season=...&sort=xg&limit=...
+    import shots_data
+    import shots_stats
 
+    snapshot = shots_data.source()
+    try:
+        params = shots_stats.parse(request.args, players=snapshot.data['players'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    result = shots_stats.query(snapshot.data['stats'], **params)
+    response = jsonify(dict(result, version=snapshot.version, by=params['by'], sort=params['sort']))
+    response.add_etag()
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 
 @app.route('/teams', methods=['GET', 'POST'])
@@ -34,10 +182,12 @@ def teams():
     if request.method == 'POST':
         col = request.form['column']
         order = request.form['order']
-        best_teams.generate(col, order)
+        options = render_options.parse(request.values)
+        key = render_service.submit('best_teams', {'column': col, 'order': order, **options})
         return render_template('best_teams.html',
                                columns=COLUMNS,
                                order_var = ORDER_VAR,
+                               image_url=image_url(key),
                                image_ready=True)
 
     return render_template('best_teams.html',
@@ -52,9 +202,11 @@ def players():
     order = None
     if request.method == 'POST':
         order = request.form['order']
-        best_players.generate(order)
+        options = render_options.parse(request.values)
+        key = render_service.submit('best_players', {'order': order, **options})
         return render_template('best_players.html',
                                order_var = ORDER_VAR_G,
+                               image_url=image_url(key),
                                image_ready=True)
 
     return render_template('best_players.html',
@@ -85,17 +237,14 @@ def shots():
         filters["team"] = request.form.get("team")
         filters["player"] = request.form.get("player")
 
-        # выбор набора типов карты
-        if filters["graphic"] == "Тепловая карта":
-            valid_maps = MAP_TYPE_VAR_HEAT
-        else:
-            valid_maps = MAP_TYPE_VAR_POINTS
+        # выбор функции и набора типов карты
+        task, valid_maps = GRAPHIC_TASKS.get(filters["graphic"], GRAPHIC_TASKS['Точечное распределение'])
+        # тип карты мог остаться от другого графика, у которого он есть
+        if filters["map_type"] not in valid_maps:
+            filters["map_type"] = valid_maps[0]
 
-        # выбор функции
-        if filters["graphic"] == 'Тепловая карта':
-            shots_map.generate_heat_map(**filters)
-        else:
-            shots_map.generate_heat_map_points(**filters)
+        options = render_options.parse(request.values)
+        key = render_service.submit(task, {**filters, **options})
 
         return render_template(
             "shots_map.html",
@@ -107,6 +256,7 @@ def shots():
             map_type_list=valid_maps,
             team_list=TEAM_VAR,
             selected=filters,
+            image_url=image_url(key),
             image_ready=True
         )
 
@@ -124,4 +274,15 @@ def shots():
     )
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    # PREWARM=1 — в фоне нарисовать все конечные комбинации фильтров и перерисовывать их после обновления CSV.
+    # С debug-перезагрузчиком код выполняется дважды, прогревы запускаем только в рабочем процессе.
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_warm_up()
+        if os.environ.get('PREWARM') == '1':
+            prewarm.start_background()
+        # INGEST=1 — в фоне дописывать в датасет новые файлы игр из static/csv/games (см. shots_ingest.py).
+        # Отдельным процессом: догрузка загружает куб сеток плотности, веб-процесс его не держит
+        if os.environ.get('INGEST') == '1':
+            subprocess.Popen([sys.executable, '-m', 'shots_ingest', '--watch'])
+    # Отрисовка не использует глобальное состояние pyplot, поэтому запросы можно обслуживать параллельно
+    app.run(debug=True, threaded=True)
\ No newline at end of file
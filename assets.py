@@ -0,0 +1,79 @@
+import functools
+import os
+
+import numpy as np
+from PIL import Image
+
+# Кэш логотипов команд и фото игроков для таблиц.
+# Каждая картинка декодируется один раз, уменьшается до размера, в котором её рисуют,
+# и хранится в памяти как uint8 RGBA. Повторная отрисовка таблиц не читает файлы.
+LOGOS_PATH = os.path.join('static', 'images', 'logos')
+PHOTOS_PATH = os.path.join('static', 'images', 'players')
+LOGOS_CACHE_SIZE = 64     # команд в лиге ~20
+PHOTOS_CACHE_SIZE = 512   # фото вратарей больше, держим ограниченное число
+
+
+def _decode(path, max_px):
+    """
+    Читает картинку и уменьшает её так, чтобы большая сторона была не больше max_px.
+
+    Args:
+        path (str): Путь к PNG.
+        max_px (int): Предельный размер большей стороны в пикселях.
+
+    Returns:
+        np.ndarray | None: Массив (h, w, 4) uint8 только для чтения или None, если файла нет.
+    """
+    if not os.path.exists(path):
+        return None
+    with Image.open(path) as img:
+        img = img.convert('RGBA')
+        scale = max_px / max(img.size)
+        # Только уменьшаем: увеличение оставляем matplotlib, лишние пиксели в памяти не нужны
+        if scale < 1:
+            size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            img = img.resize(size, Image.LANCZOS)
+        array = np.asarray(img, dtype=np.uint8).copy()
+    array.setflags(write=False)
+    return array
+
+
+@functools.lru_cache(maxsize=LOGOS_CACHE_SIZE)
+def logo(team_name_long, max_px):
+    """
+    Логотип команды.
+
+    Args:
+        team_name_long (str): Полное имя команды (имя файла в LOGOS_PATH).
+        max_px (int): Размер большей стороны при отрисовке в пикселях.
+
+    Returns:
+        np.ndarray | None: RGBA uint8 или None, если логотипа нет.
+    """
+    return _decode(os.path.join(LOGOS_PATH, f'{team_name_long}.png'), max_px)
+
+
+@functools.lru_cache(maxsize=PHOTOS_CACHE_SIZE)
+def photo(link, max_px):
+    """
+    Фото игрока.
+
+    Args:
+        link (str): Id игрока (имя файла в PHOTOS_PATH).
+        max_px (int): Размер большей стороны при отрисовке в пикселях.
+
+    Returns:
+        np.ndarray | None: RGBA uint8 или None, если фото нет.
+    """
+    return _decode(os.path.join(PHOTOS_PATH, f'{link}.png'), max_px)
+
+
+def warm():
+    """Заранее декодирует логотипы всех команд и фото вратарей из таблиц."""
+    import best_players
+    import best_teams
+
+    for team in best_teams.source().data['team_name_long']:
+        logo(team, best_teams.LOGO_PX)
+    for link in best_players.source().data['link']:
+        photo(str(link), best_players.PHOTO_PX)
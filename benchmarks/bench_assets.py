@@ -0,0 +1,54 @@
+"""
+Бенчмарк кэша логотипов и фото: время отрисовки таблиц команд и вратарей
+с пустым кэшем assets и после assets.warm(). Заодно проверяет, что после прогрева
+отрисовка таблиц не открывает ни одного файла картинки.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_assets
+"""
+import io
+import time
+from unittest import mock
+
+from PIL import Image
+
+import assets
+import best_players
+import best_teams
+
+REPEATS = 5
+TABLES = [
+    ('команды', lambda out: best_teams.render('Общий рейтинг (Net)', 'По убыванию', out)),
+    ('вратари', lambda out: best_players.render('10 лучших вратарей по GSAx', out)),
+]
+
+
+def clear():
+    assets.logo.cache_clear()
+    assets.photo.cache_clear()
+
+
+def timed(render):
+    start = time.perf_counter()
+    render(io.BytesIO())
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    print(f'{"таблица":>10} {"холодный, мс":>14} {"прогретый, мс":>15} {"открытий файлов":>16}')
+    for name, render in TABLES:
+        cold = []
+        for _ in range(REPEATS):
+            clear()
+            cold.append(timed(render))
+
+        clear()
+        assets.warm()
+        with mock.patch.object(Image, 'open', wraps=Image.open) as opened:
+            warm = [timed(render) for _ in range(REPEATS)]
+        print(f'{name:>10} {min(cold):14.0f} {min(warm):15.0f} {opened.call_count:16d}')
+        assert opened.call_count == 0, f'{name}: картинки читаются с диска после прогрева'
+
+
+if __name__ == '__main__':
+    main()
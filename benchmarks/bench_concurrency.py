@@ -0,0 +1,84 @@
+"""
+Проверка параллельной отрисовки: пачка POST /shots с разными фильтрами отправляется
+из пула потоков в Flask-приложение, и каждая получившаяся картинка сравнивается
+побайтно с последовательной отрисовкой тех же фильтров. Картинки рисуются в пуле
+процессов render_service и забираются по ссылке из страницы. Заодно печатается время.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_concurrency [потоков]
+"""
+import io
+import itertools
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import render_cache
+import shots_map
+from app import app
+
+TEAMS = ['Авангард', 'Трактор', 'СКА', 'ЦСКА']
+SEASONS = ['2025', '2026']
+GRAPHICS = [('Тепловая карта', 'Броски'), ('Тепловая карта', 'xG'), ('Точечное распределение', 'xG')]
+
+
+def filter_sets():
+    for team, season, (graphic, map_type) in itertools.product(TEAMS, SEASONS, GRAPHICS):
+        yield dict(season=season, stage='All', pos='All', format='All', graphic=graphic,
+                   map_type=map_type, team=team, player='')
+
+
+def serial_png(filters):
+    out = io.BytesIO()
+    if filters['graphic'] == 'Тепловая карта':
+        shots_map.render_heat_map(output_path=out, **filters)
+    else:
+        shots_map.render_heat_map_points(output_path=out, **filters)
+    return out.getvalue()
+
+
+def post_shots(filters):
+    with app.test_client() as client:
+        response = client.post('/shots', data=filters)
+        assert response.status_code == 200, response.status_code
+        src = re.search(r'<img src="([^"]+)"', response.get_data(as_text=True)).group(1)
+        image = client.get(src)
+    assert image.status_code == 200, image.status_code
+    return image.data
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    requests = list(filter_sets())
+
+    start = time.perf_counter()
+    expected = [serial_png(f) for f in requests]
+    serial_time = time.perf_counter() - start
+
+    # Отдельный пустой кэш, чтобы все запросы реально рисовали.
+    # Каталог передаётся процессам пула при его создании (initargs), а пул создаётся при первом
+    # запросе к app — поэтому подменяем каталог до него, и воркеры пишут картинки туда же.
+    cache_dir = render_cache.CACHE_DIR
+    render_cache.CACHE_DIR = tempfile.mkdtemp(dir=os.path.dirname(cache_dir))
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(threads) as pool:
+            results = list(pool.map(post_shots, requests))
+        parallel_time = time.perf_counter() - start
+    finally:
+        shutil.rmtree(render_cache.CACHE_DIR, ignore_errors=True)
+        render_cache.CACHE_DIR = cache_dir
+
+    mismatched = [f for f, got, want in zip(requests, results, expected) if got != want]
+    print(f'запросов: {len(requests)}, потоков: {threads}')
+    print(f'последовательно: {serial_time:.2f} с, параллельно через /shots: {parallel_time:.2f} с')
+    print(f'несовпадений с последовательной отрисовкой: {len(mismatched)}')
+    assert not mismatched, mismatched
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Бенчмарк тепловой карты: seaborn.kdeplot (как было в shots_map) против FFT binned KDE
+из shots_density при 1k, 10k и 100k бросков. Время включает оценку плотности и contourf.
+
+Выборки больше датасета набираются бутстрепом с небольшим шумом.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_density
+"""
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import seaborn as sns
+
+import shots_density
+import shots_map
+
+SIZES = [1_000, 10_000, 100_000]
+
+
+def sample(n, rng):
+    df = shots_map.dataset()[0]
+    x, y = df['x_rink'].to_numpy(), df['y_rink'].to_numpy()
+    idx = rng.integers(0, len(x), n)
+    return x[idx] + rng.normal(0, 0.1, n), y[idx] + rng.normal(0, 0.1, n), df['pred_proba'].to_numpy()[idx]
+
+
+def seaborn_kde(x, y, w):
+    fig, ax = plt.subplots()
+    sns.kdeplot(x=x, y=y, weights=w, fill=True, cmap="RdPu", thresh=0.08, levels=10, ax=ax, alpha=0.6)
+    plt.close(fig)
+
+
+def fft_kde(x, y, w):
+    fig, ax = plt.subplots()
+    shots_density.draw(ax, shots_density.binned_kde(x, y, weights=w), thresh=0.08, levels=10, cmap="RdPu", alpha=0.6)
+    plt.close(fig)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'бросков':>8} {'веса':<6} {'seaborn, мс':>12} {'FFT, мс':>9} {'ускорение':>10}")
+    for n in SIZES:
+        x, y, xg = sample(n, rng)
+        for label, w in (('нет', None), ('xG', xg)):
+            slow = timed(seaborn_kde, x, y, w)
+            fast = timed(fft_kde, x, y, w)
+            print(f"{n:>8} {label:<6} {slow:>12.1f} {fast:>9.1f} {slow / fast:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
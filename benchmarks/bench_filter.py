@@ -0,0 +1,61 @@
+"""
+Бенчмарк фильтрации бросков: цепочка булевых масок по DataFrame (как было в shots_map)
+против индекса shots_index. Для каждой комбинации сверяет, что отобраны те же строки.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_filter
+"""
+import time
+
+import shots_index
+import shots_store
+
+REPEATS = 200
+
+QUERIES = [
+    dict(team='All', season='All', pos='All', player_name='All', format='All', goal=None),
+    dict(team='Трактор', season=['2026'], pos='н', player_name='All', format='All', goal=None),
+    dict(team='All', season=['2025', '2026'], pos='з', player_name='All', format='PP', goal=True),
+    dict(team='All', season='All', pos='All', player_name='Шэн Павел', format='All', goal=None),
+]
+
+
+def mask_filter(df, team, season, pos, player_name, format, goal):
+    if team != 'All':
+        df = df[df['team'] == team]
+    if season != 'All':
+        df = df[df['season'].isin(season)]
+    if pos != 'All':
+        df = df[df['pos'] == pos]
+    if player_name != 'All':
+        df = df[df['player_name'] == player_name]
+    if format != 'All':
+        df = df[df['format'] == format]
+    if goal:
+        df = df[df['goal'] == True]
+    return df
+
+
+def timed(func):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        out = func()
+    return out, (time.perf_counter() - start) / REPEATS * 1000
+
+
+def main():
+    df = shots_store.load()
+    start = time.perf_counter()
+    index = shots_index.build(df)
+    print(f'строк: {len(df)}, построение индекса: {(time.perf_counter() - start) * 1000:.1f} мс')
+    print(f"{'запрос':<45} {'строк':>7} {'маски, мс':>10} {'индекс, мс':>11}")
+    for query in QUERIES:
+        masked, mask_ms = timed(lambda: mask_filter(df, **query))
+        indexed, index_ms = timed(lambda: df.iloc[shots_index.select(index, **query)])
+        assert masked.index.equals(indexed.index)
+        name = ', '.join(f'{k}={v}' for k, v in query.items() if v not in ('All', None))
+        print(f"{name or 'All':<45} {len(indexed):>7} {mask_ms:>10.3f} {index_ms:>11.3f}")
+
+
+if __name__ == '__main__':
+    main()
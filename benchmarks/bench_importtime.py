@@ -0,0 +1,106 @@
+"""
+Бенчмарк холодного старта веб-приложения: python -X importtime для `import app`
+и время первого ответа на главную страницу в свежем процессе.
+
+Каждый запуск дописывает строку в benchmarks/importtime_history.csv и сравнивает
+её с предыдущей, так что регрессии видны в истории коммитов.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_importtime [сколько модулей показать]
+"""
+import csv
+import datetime
+import json
+import os
+import subprocess
+import sys
+
+HISTORY = os.path.join(os.path.dirname(__file__), 'importtime_history.csv')
+FIELDS = ['date', 'commit', 'import_ms', 'first_response_ms', 'slowest_module']
+REGRESSION = 1.2  # на сколько можно медленнее предыдущего запуска без предупреждения
+REPEATS = 3
+
+FIRST_RESPONSE = """
+import json, time
+start = time.perf_counter()
+import app
+response = app.app.test_client().get('/')
+print(json.dumps({'ms': (time.perf_counter() - start) * 1000, 'status': response.status_code}))
+"""
+
+
+def importtime():
+    """Разбирает вывод -X importtime: {модуль: (собственное время, накопленное время)} в мс."""
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                         capture_output=True, text=True, check=True)
+    modules = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+    return modules
+
+
+def first_response_ms():
+    out = subprocess.run([sys.executable, '-c', FIRST_RESPONSE], capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    assert result['status'] == 200, result
+    return result['ms']
+
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def previous_run():
+    if not os.path.exists(HISTORY):
+        return None
+    with open(HISTORY, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    return rows[-1] if rows else None
+
+
+def main():
+    top = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    # Минимум из нескольких запусков: меньше шума от файлового кэша и соседних процессов
+    runs = [importtime() for _ in range(REPEATS)]
+    modules = min(runs, key=lambda m: m['app'][1])
+    import_ms = modules['app'][1]
+    response_ms = min(first_response_ms() for _ in range(REPEATS))
+
+    print(f'import app: {import_ms:.0f} мс, первый ответ /: {response_ms:.0f} мс')
+    print(f'{"модуль":<40} {"своё, мс":>10} {"всего, мс":>10}')
+    # Верхнеуровневые тяжёлые модули: сортировка по накопленному времени
+    for name, (self_ms, cumulative_ms) in sorted(modules.items(), key=lambda kv: -kv[1][1])[1:top + 1]:
+        print(f'{name:<40} {self_ms:10.1f} {cumulative_ms:10.1f}')
+
+    slowest = max((m for m in modules if m != 'app'), key=lambda m: modules[m][1])
+    row = {'date': datetime.date.today().isoformat(), 'commit': git_commit(),
+           'import_ms': f'{import_ms:.0f}', 'first_response_ms': f'{response_ms:.0f}', 'slowest_module': slowest}
+
+    previous = previous_run()
+    if previous is not None:
+        for field in ['import_ms', 'first_response_ms']:
+            before, after = float(previous[field]), float(row[field])
+            flag = '  <-- регрессия' if after > before * REGRESSION else ''
+            print(f'{field}: {before:.0f} -> {after:.0f} мс (коммит {previous["commit"] or "?"}){flag}')
+
+    if row['commit'].endswith('-dirty'):
+        # Замер незакоммиченного дерева не привязать ни к какому коммиту — в историю его не пишем
+        print(f'дерево изменено ({row["commit"]}): строка в {os.path.basename(HISTORY)} не добавлена')
+        return
+    new_file = not os.path.exists(HISTORY)
+    with open(HISTORY, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        if new_file:
+            writer.writeheader()
+        writer.writerow(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Бенчмарк пресетов вывода: размер и время отрисовки каждой картинки
+для всех сочетаний пресета разрешения и формата из render_options.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_options
+"""
+import io
+import itertools
+import time
+
+import assets
+import best_players
+import best_teams
+import render_options
+import shots_map
+
+SHOTS = dict(season='2026', stage='All', pos='All', format='All', map_type='Броски', team='Авангард', player='')
+RENDERS = [
+    ('команды', lambda out, **o: best_teams.render('Общий рейтинг (Net)', 'По убыванию', out, **o)),
+    ('вратари', lambda out, **o: best_players.render('10 лучших вратарей по GSAx', out, **o)),
+    ('тепловая', lambda out, **o: shots_map.render_heat_map(graphic='Тепловая карта', output_path=out, **SHOTS, **o)),
+    ('точечная', lambda out, **o: shots_map.render_heat_map_points(graphic='Точечное распределение',
+                                                                   output_path=out, **SHOTS, **o)),
+    ('зоны', lambda out, **o: shots_map.render_zone_map(graphic='Зоны', output_path=out, **SHOTS, **o)),
+]
+
+
+def measure(render, quality, fmt):
+    out = io.BytesIO()
+    start = time.perf_counter()
+    render(out, quality=quality, fmt=fmt)
+    return len(out.getvalue()), (time.perf_counter() - start) * 1000
+
+
+def main():
+    assets.warm()
+    print(f'{"картинка":>10} {"пресет":>10} {"формат":>7} {"КБ":>8} {"мс":>8}')
+    for (name, render), quality, fmt in itertools.product(RENDERS, render_options.DPI_PRESETS,
+                                                          render_options.FORMATS):
+        measure(render, quality, fmt)  # прогрев кэшей логотипов/фото под этот dpi
+        size, ms = measure(render, quality, fmt)
+        print(f'{name:>10} {quality:>10} {fmt:>7} {size / 1024:8.0f} {ms:8.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Бенчмарк поиска игрока: индекс player_search (bisect по отсортированным ключам) против прохода
+по всем именам датасета с нормализацией каждой строки.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_player_search [повторов]
+"""
+import sys
+import time
+
+import player_search
+import shots_data
+
+QUERIES = ['бел', 'белозеров', 'павел', 'волков а', 'ш']
+
+
+def scan(names, query):
+    # Как искали бы без индекса: нормализация каждого имени и сравнение с каждым его словом
+    query = player_search.normalize(query)
+    found = []
+    for name in names:
+        words = player_search.normalize(name).split(' ')
+        if any(' '.join(words[i:]).startswith(query) for i in range(len(words))):
+            found.append(name)
+    return found
+
+
+def per_call_us(func, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    data = shots_data.source().data
+    index = data['players']
+    start = time.perf_counter()
+    player_search.build(data['df'])
+    print(f'игроков: {len(index["names"])}, ключей: {len(index["keys"])}, '
+          f'построение индекса: {(time.perf_counter() - start) * 1000:.1f} мс')
+    print(f'{"запрос":>12} {"найдено":>8} {"индекс, мкс":>12} {"перебор, мкс":>13}')
+    for query in QUERIES:
+        found = len(player_search.search(index, query, limit=len(index['names'])))
+        index_us = per_call_us(lambda: player_search.search(index, query), repeats * 10)
+        scan_us = per_call_us(lambda: scan(index['names'], query), repeats)
+        print(f'{query:>12} {found:8d} {index_us:12.1f} {scan_us:13.0f}')
+
+
+if __name__ == '__main__':
+    main()
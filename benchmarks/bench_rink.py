@@ -0,0 +1,69 @@
+"""
+Бенчмарк отрисовки площадки: время на один запрос до и после кэша rink_layer.
+
+"до"    — геометрия строится заново, каждая линия — отдельный ax.plot (как раньше в gg_rink);
+"после" — геометрия из кэша, по одной LineCollection на стиль.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_rink
+"""
+import io
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import matplotlib.patches as patches
+
+import shots_map
+
+REPEATS = 20
+
+
+def legacy_rink(side, specs):
+    # Поведение до кэша: пересчёт геометрии и отдельный artist на каждую линию
+    shots_map.rink_layer.cache_clear()
+    layer = shots_map.rink_layer(side, specs)
+    fig, ax = plt.subplots(figsize=(10, 12))
+    ax.set_xlim(*layer['xlim'])
+    ax.set_ylim(*layer['ylim'])
+    ax.set_facecolor("white")
+    ax.axis('off')
+    for (color, linewidth, linestyle, zorder), paths in layer['lines']:
+        for path in paths:
+            ax.plot(path[:, 0], path[:, 1], color=color, linewidth=linewidth, linestyle=linestyle, zorder=zorder)
+    for center, radius, color in layer['circles']:
+        ax.add_patch(patches.Circle(center, radius, edgecolor=color, facecolor='none'))
+    for color, (xs, ys) in layer['dots'].items():
+        for x, y in zip(xs, ys):
+            ax.plot(x, y, 'o', color=color, markersize=4)
+    ax.set_aspect('equal', adjustable='box')
+    plt.tight_layout()
+    return fig, ax
+
+
+def cached_rink(side, specs):
+    return shots_map.gg_rink(side=side, specs=specs)
+
+
+def measure(build, side, specs):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fig, ax = build(side, specs)
+        fig.savefig(io.BytesIO(), format='png', bbox_inches='tight')
+        plt.close(fig)
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+def main():
+    print(f"{'side':<6} {'specs':<5} {'до, мс':>10} {'после, мс':>10} {'ускорение':>10}")
+    for side in ['right', 'left']:
+        for specs in ['nhl', 'iihf']:
+            before = measure(legacy_rink, side, specs)
+            shots_map.rink_layer(side, specs)  # прогрев кэша
+            after = measure(cached_rink, side, specs)
+            print(f"{side:<6} {specs:<5} {before:>10.1f} {after:>10.1f} {before / after:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Бенчмарк API данных карты бросков (shots_api): размер ответа в упакованном float32 и JSON,
+с gzip и без, время подготовки страницы — против серверной отрисовки точечной карты в PNG.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_shots_api
+"""
+import gzip
+import io
+import time
+
+import shots_api
+import shots_data
+import shots_map
+
+QUERIES = [
+    ('команда, сезон', dict(team='Авангард', season='2026')),
+    ('все, сезон', dict(season='2026')),
+    ('все', {}),
+]
+
+
+def build_page(filters, encoding):
+    # Без кэша страниц shots_api: меряем саму выборку и кодирование
+    snapshot = shots_data.source()
+    header, columns = shots_api._select(snapshot, filters, 0, shots_api.MAX_LIMIT)
+    start = time.perf_counter()
+    header, columns = shots_api._select(snapshot, filters, 0, shots_api.MAX_LIMIT)
+    body = shots_api._pack(header, columns) if encoding == 'f32' else shots_api._json(header, columns)
+    ms = (time.perf_counter() - start) * 1000
+    return header['count'], body, ms
+
+
+def render_png_ms(filters):
+    out = io.BytesIO()
+    args = dict(season='All', stage='All', pos='All', format='All', graphic='Точечное распределение',
+                map_type='Броски', team='All', player='')
+    args.update(filters)
+    start = time.perf_counter()
+    shots_map.render_heat_map_points(output_path=out, **args)
+    return (time.perf_counter() - start) * 1000, len(out.getvalue())
+
+
+def main():
+    shots_data.source()
+    print(f'{"выборка":>16} {"бросков":>8} {"формат":>6} {"КБ":>7} {"gzip КБ":>8} {"мс":>6}')
+    for name, query in QUERIES:
+        filters, _, _, _ = shots_api.parse(query)
+        for encoding in shots_api.ENCODINGS:
+            count, body, ms = build_page(filters, encoding)
+            packed = gzip.compress(body, compresslevel=6, mtime=0)
+            print(f'{name:>16} {count:8d} {encoding:>6} {len(body) / 1024:7.0f} {len(packed) / 1024:8.0f} {ms:6.1f}')
+        png_ms, png_size = render_png_ms(query)
+        print(f'{name:>16} {"":8} {"png":>6} {png_size / 1024:7.0f} {"":8} {png_ms:6.0f}')
+
+
+if __name__ == '__main__':
+    main()
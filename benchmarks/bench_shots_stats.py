@@ -0,0 +1,63 @@
+"""
+Бенчмарк куба статистики бросков (shots_stats): сборка и дописывание игры против запросов
+к кубу и той же сводки через groupby по строкам датасета.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_shots_stats [повторов]
+"""
+import sys
+import time
+
+import shots_stats
+import shots_store
+
+QUERIES = [
+    ('лидеры по xG, сезон', dict(filters={'season': '2026'}, by=['player'], min_shots=20)),
+    ('команды', dict(by=['team'], sort='goals')),
+    ('команда против соперников', dict(filters={'team': 'Авангард'}, by=['opponent', 'home'])),
+    ('реализация в большинстве', dict(filters={'format': 'PP'}, by=['player', 'team'], sort='goals_minus_xg')),
+]
+
+
+def per_call_ms(func, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def groupby_ms(df, query, repeats):
+    # Та же сводка по сырым строкам: фильтр и groupby по всему датасету
+    dims = [shots_stats.PARAMS[param] for param in query['by']]
+
+    def run():
+        mask = True
+        for param, value in query.get('filters', {}).items():
+            mask = mask & (df[shots_stats.PARAMS[param]] == value)
+        rows = df[mask] if mask is not True else df
+        rows.groupby(dims, observed=True, dropna=False).agg(
+            shots=('goal', 'size'), goals=('goal', 'sum'), xg=('pred_proba', 'sum'))
+
+    return per_call_ms(run, repeats)
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    df = shots_store.load()
+    build_ms = per_call_ms(lambda: shots_stats.build(df), 5)
+    cube = shots_stats.build(df)
+    # Дописывание последней игры, как после shots_ingest
+    start = len(df) - int((df['game'] == df['game'].iloc[-1]).sum())
+    head = shots_stats.build(df.iloc[:start])
+    update_ms = per_call_ms(lambda: shots_stats.update(head, df, start), 5)
+    print(f'бросков: {len(df)}, ячеек куба: {len(cube["cells"]["shots"])}, '
+          f'сборка: {build_ms:.0f} мс, дописывание игры ({len(df) - start} бросков): {update_ms:.0f} мс')
+    print(f'{"запрос":>28} {"групп":>6} {"куб, мс":>8} {"groupby, мс":>12}')
+    for name, query in QUERIES:
+        groups = shots_stats.query(cube, **query)['groups']
+        cube_ms = per_call_ms(lambda: shots_stats.query(cube, **query), repeats)
+        print(f'{name:>28} {groups:6d} {cube_ms:8.2f} {groupby_ms(df, query, repeats):12.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Soak-тест отрисовки: тысячи карт подряд в одном процессе, RSS должен оставаться ровным.
+Рисуются тепловые и точечные карты с разными фильтрами, таблицы команд и вратарей
+(в память, без кэша). Прогрев — один полный круг всех вариантов: после него
+RSS не должен вырасти больше чем на MAX_GROWTH_MB.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_soak [число_карт]
+"""
+import gc
+import io
+import itertools
+import sys
+import time
+
+import best_players
+import best_teams
+import shots_map
+
+MAX_GROWTH_MB = 50
+
+
+def rss_mb():
+    # текущий RSS процесса (Linux), после сборки мусора
+    gc.collect()
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+
+
+def requests():
+    teams = ['All', 'Авангард', 'Трактор', 'СКА', 'ЦСКА']
+    seasons = ['All', '2025', '2026']
+    positions = ['All', 'нападающие', 'защитники']
+    renders = [
+        lambda: best_teams.render('Общий рейтинг (Net)', 'По убыванию', io.BytesIO()),
+        lambda: best_players.render('10 лучших вратарей по GSAx', io.BytesIO()),
+    ]
+    for team, season, pos in itertools.product(teams, seasons, positions):
+        filters = dict(season=season, stage='All', pos=pos, format='All', team=team, player='All')
+        renders.append(lambda f=filters: shots_map.render_heat_map(
+            graphic='Тепловая карта', map_type='Броски', output_path=io.BytesIO(), **f))
+        renders.append(lambda f=filters: shots_map.render_heat_map_points(
+            graphic='Точечное распределение', map_type='xG', output_path=io.BytesIO(), **f))
+    return renders
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    renders = requests()
+    start = time.perf_counter()
+    for render in renders:
+        render()
+    baseline = rss_mb()
+    print(f'RSS после прогрева ({len(renders)} карт): {baseline:.1f} МБ')
+
+    jobs = itertools.cycle(renders)
+    for i in range(1, total + 1):
+        next(jobs)()
+        if i % 250 == 0 or i == total:
+            print(f'{i:>6} карт: RSS {rss_mb():.1f} МБ, {time.perf_counter() - start:.0f} с')
+
+    growth = rss_mb() - baseline
+    print(f'Рост RSS: {growth:.1f} МБ')
+    assert growth < MAX_GROWTH_MB, f'RSS вырос на {growth:.1f} МБ (порог {MAX_GROWTH_MB} МБ)'
+
+
+if __name__ == '__main__':
+    main()
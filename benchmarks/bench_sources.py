@@ -0,0 +1,38 @@
+"""
+Бенчмарк слоя исходных данных: чтение CSV на каждый запрос (как было в best_teams/best_players)
+против снимка data_sources, который перечитывается только при изменении файла.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_sources [повторов]
+"""
+import sys
+import time
+
+import pandas as pd
+
+import best_players
+import best_teams
+
+SOURCES = [('best_teams.csv', best_teams.TEAMS_CSV, best_teams.source),
+           ('best_goalies.csv', best_players.GOALIES_CSV, best_players.source)]
+
+
+def per_call_us(func, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f'{"файл":>18} {"read_csv, мкс":>14} {"снимок, мкс":>12}')
+    for name, path, source in SOURCES:
+        source()  # первая загрузка снимка
+        csv_us = per_call_us(lambda: pd.read_csv(path, index_col=0), repeats)
+        snapshot_us = per_call_us(source, repeats * 100)
+        print(f'{name:>18} {csv_us:14.0f} {snapshot_us:12.1f}')
+
+
+if __name__ == '__main__':
+    main()
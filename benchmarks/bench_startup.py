@@ -0,0 +1,51 @@
+"""
+Бенчмарк старта воркера: загрузка датасета бросков из сырых CSV против колоночного хранилища.
+Каждый вариант запускается в отдельном процессе, чтобы честно мерить время и пиковую память.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_startup
+"""
+import json
+import subprocess
+import sys
+
+import shots_store
+
+PROBE = """
+import json, time
+import numpy as np, pandas as pd
+import shots_store
+
+def rss_mb():
+    # текущий RSS процесса (Linux)
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+
+rss_before = rss_mb()
+start = time.perf_counter()
+df = {loader}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'rss_mb': rss_mb() - rss_before,
+                  'df_mb': df.memory_usage(deep=True).sum() / 2 ** 20, 'rows': len(df)}}))
+"""
+
+LOADERS = {
+    'CSV + apply': 'shots_store.read_csv_sources()',
+    'shots.npz': 'shots_store.load()',
+}
+
+
+def main():
+    shots_store.build()
+    print(f"{'загрузка':<12} {'строк':>8} {'время, с':>10} {'+RSS, МБ':>10} {'DataFrame, МБ':>14}")
+    for name, loader in LOADERS.items():
+        out = subprocess.run([sys.executable, '-c', PROBE.format(loader=loader)],
+                             capture_output=True, text=True, check=True)
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{name:<12} {r['rows']:>8} {r['seconds']:>10.3f} {r['rss_mb']:>10.1f} {r['df_mb']:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
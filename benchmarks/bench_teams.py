@@ -0,0 +1,211 @@
+"""
+Бенчмарк таблицы команд: прежняя отрисовка (отдельный artist на каждую ячейку)
+против пакетной best_teams.render. Проверяет, что картинки совпадают попиксельно
+для всех сортировок, и печатает среднее время.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_teams
+"""
+import io
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import LinearSegmentedColormap, TwoSlopeNorm
+from matplotlib.figure import Figure
+from matplotlib.offsetbox import AnnotationBbox, OffsetImage
+from matplotlib.patches import Rectangle
+
+import assets
+import best_teams
+import render_options
+
+REPEATS = 5
+
+
+def legacy_render(column, order, output_path, quality='print', fmt='png'):
+    # Прежняя отрисовка: отдельный artist на каждую ячейку, столбик и прямоугольник
+    columns = {'Команда': 'team', 'Общий рейтинг (Net)': 'net', 'Атакующий рейтинг (Off)': 'off',
+               'Защитный рейтинг (Def)': 'def', 'Заброшенные шайбы (ЗШ)': 'gf', 'Пропущенный шайбы (ПШ)': 'ga',
+               'Разница шайб (РШ)': 'gd', 'Ожидаемые шайбы (xG)': 'xg', 'Ожидаемые пропущенные шайбы (xGA)': 'xga',
+               'Ожидаемая разница шайб (xGD)': 'xgd', 'Шансы на плей-офф': 'play-offs'}
+    column = columns[column]
+    prep_table = pd.read_csv(best_teams.TEAMS_CSV, index_col=0)
+    prep_table = prep_table.sort_values(column, ascending=best_teams.order_var[order]).reset_index(drop=True)
+
+    cmap = LinearSegmentedColormap.from_list("blue_white_red", ["#e07a5f", "white", "#8ecae6"])
+    norm = TwoSlopeNorm(vmin=prep_table[['off', 'def', 'net']].min().min(),
+                        vcenter=prep_table[['off', 'def', 'net']].mean().mean(),
+                        vmax=prep_table[['off', 'def', 'net']].max().max())
+
+    fig = Figure(figsize=(12, len(prep_table) * 0.45))
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    ax.set_facecolor("#ffffff")
+    ax.axis("off")
+
+    row_h = 0.45
+    y = 1
+
+    gf_max = prep_table['gf'].max()
+    gf_min = prep_table['gf'].min()
+    ga_max = prep_table['ga'].max()
+    ga_min = prep_table['ga'].min()
+    xg_max = prep_table['xg'].max()
+    xg_min = prep_table['xg'].min()
+    xga_max = prep_table['xga'].max()
+    xga_min = prep_table['xga'].min()
+    ax.plot([-1.5, 12], [y - 0.75, y - 0.75], color='black', lw=1)
+    ax.plot([2.85, 12], [y - 0.35, y - 0.35], color='#999999', lw=0.75)
+    ax.plot([1.9, 1.9], [y - 0.75, -21.5 * row_h], zorder=11, color='black', lw=0.7)
+    ax.plot([2.85, 2.85], [y - 0.75, -21.5 * row_h], zorder=11, color='black', lw=0.7)
+    ax.plot([5.9, 5.9], [y - 0.75, -21.5 * row_h], zorder=11, color='black', lw=0.7)
+    ax.plot([9.49, 9.49], [y - 0.75, -21.5 * row_h], zorder=11, color='black', lw=0.7)
+    ax.plot([12.55, 12.55], [y - 0.75, -21.5 * row_h], zorder=11, color='black', lw=0.7)
+    for i, row in prep_table.iterrows():
+        y = -i * row_h
+        ax.axhline(y - row_h / 2, zorder=1, color='#f7f7f7', lw=0.75)
+
+        logo_img = assets.logo(row['team_name_long'], best_teams.logo_px(quality))
+        if logo_img is not None:
+            h, w = logo_img.shape[:2]
+            zoom = best_teams.LOGO_POINTS / max(w, h)
+
+            imagebox = OffsetImage(logo_img, zoom=zoom)
+            imagebox.image.axes = ax
+
+            ab = AnnotationBbox(
+                imagebox,
+                (-.74, y),  # позиция
+                xycoords='data',
+                frameon=False,
+                zorder=9
+            )
+
+            ax.add_artist(ab)
+
+        ax.text(-0.51, y, f"{row['team']}",
+                ha='left', va='center', fontsize=10, color="black")
+        ax.text(-0.51, y, " " * (2 * len(row['team']) + 4) + f"{row['record']}",
+                ha='left', va='center', fontsize=9, color="#222", alpha=0.8)
+
+        ax.text(2.375, y,
+                f"{int(row['play-offs']) if row['play-offs'] >= 1 else '>0' if row['play-offs'] > 0 else '>0'}%",
+                ha='center', va='center', fontsize=10, color="#444", alpha=0.5 + 0.5 * row['play-offs'] / 100)
+
+        base_x = 2.95
+        base_x1 = 4.25
+        gf_width = (row['gf'] / gf_max * 0.9) ** 1.8
+        ga_width = ((1 + ga_min / (ga_max) - (row['ga'] / ga_max)) * 0.9) ** 1.8
+        ax.barh(y, 0.9 ** 1.8, height=0.1, color="#E1E1E1", left=base_x)
+        ax.barh(y, gf_width, height=0.1, color="#219ebc", left=base_x)
+
+        ax.barh(y, 0.9 ** 1.8, height=0.1, color="#E1E1E1", left=base_x1)
+        ax.barh(y, ga_width, height=0.1, color="#8ecae6", left=base_x1)
+
+        ax.text(base_x + 0.9, y, f"{int(row['gf'])}",
+                ha='left', va='center', fontsize=9, color="#333")
+        ax.text(base_x1 + 0.9, y, f"{int(row['ga'])}",
+                ha='left', va='center', fontsize=9, color="#333")
+        if row['gd'] > 0:
+            color = 'green'
+            text = f"+{int(row['gd'])}"
+        elif row['gd'] < 0:
+            color = 'red'
+            text = f"{int(row['gd'])}"
+        else:
+            color = 'black'
+            text = f"{int(row['gd'])}"
+        ax.text(base_x1 + 1.25, y, text,
+                ha='left', va='center', fontsize=9, color=color)
+        base_x = 5.95
+        base_x1 = 7.4
+        xg_width = (row['xg'] / xg_max * 0.9) ** 1.8
+        xga_width = ((1 + xga_min / xga_max - row['xga'] / xga_max) * 0.9) ** 1.8
+        ax.barh(y, 0.9 ** 1.8, height=0.1, color="#E1E1E1", left=base_x)
+        ax.barh(y, xg_width, height=0.1, color="#99582a", left=base_x)
+        ax.barh(y, 0.9 ** 1.8, height=0.1, color="#E1E1E1", left=base_x1)
+        ax.barh(y, xga_width, height=0.1, color="#e07a5f", left=base_x1)
+
+        ax.text(base_x + 0.9, y, f"{row['xg']:.1f}",
+                ha='left', va='center', fontsize=9, color="#333")
+        ax.text(base_x1 + 0.9, y, f"{row['xga']:.1f}",
+                ha='left', va='center', fontsize=9, color="#333")
+        if row['xgd'] > 0:
+            color = 'green'
+            text = f"+{row['xgd']:.1f}"
+        elif row['xgd'] < 0:
+            color = 'red'
+            text = f"{row['xgd']:.1f}"
+        else:
+            color = 'black'
+            text = f"{row['xgd']:.1f}"
+        ax.text(base_x1 + 1.5, y, text,
+                ha='left', va='center', fontsize=9, color=color)
+        start_x = 9.55
+        w = 0.8
+        for j, col in enumerate(['off', 'def', 'net']):
+            val = row[col]
+            color = cmap(norm(val))
+            ax.add_patch(Rectangle((start_x + j * w, y - 0.16), w - 0.05, 0.32,
+                                   facecolor=color, edgecolor='lightgray', lw=0.5))
+            ax.text(start_x + j * w + (w - 0.05) / 2, y, f"{val:.1f}",
+                    ha='center', va='center', fontsize=10, color="#111")
+
+    ax.text(-0.9, 0.4, "Команда", ha='left', fontsize=10, weight='bold', color="#111")
+    ax.text(2.375, 0.4, "Плей-офф", ha='center', fontsize=10, weight='bold', color="#111")
+    ax.text(4.4, 0.75, "Шайбы", ha='center', fontsize=10, weight='bold', color="#111")
+    ax.text(7.54, 0.75, "Показатели xG", ha='center', fontsize=10, weight='bold', color="#111")
+    ax.text(10.62, 0.75, "Рейтинг", ha='center', fontsize=10, weight='bold', color="#111")
+    ax.text(3.35, 0.4, "ЗШ", ha='center', fontsize=10, color="#111")
+    ax.text(4.65, 0.4, "ПШ", ha='center', fontsize=10, color="#111")
+    ax.text(5.6, 0.4, "РШ", ha='center', fontsize=10, color="#111")
+    ax.text(6.45, 0.4, "xG", ha='center', fontsize=10, color="#111")
+    ax.text(7.85, 0.4, "xGA", ha='center', fontsize=10, color="#111")
+    ax.text(9.07, 0.4, "xGD", ha='center', fontsize=10, color="#111")
+
+
+    rating_labels = ['Off', 'Def', 'Net']
+    for j, lbl in enumerate(rating_labels):
+        ax.text(9.55 + j * 0.8 + 0.35, 0.4, lbl, ha='center', fontsize=10, color="#111")
+
+    ax.set_xlim(-0.9, 11.9)
+    ax.set_ylim(-len(prep_table) * row_h, 0.8)
+    render_options.save(fig, output_path, quality, fmt, bbox_inches='tight')
+    fig.clear()
+
+
+def pixels(render, column, order):
+    out = io.BytesIO()
+    render(column, order, out)
+    return np.asarray(Image.open(out))
+
+
+def timed(render):
+    render('Общий рейтинг (Net)', 'По убыванию', io.BytesIO())
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        render('Общий рейтинг (Net)', 'По убыванию', io.BytesIO())
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+def main():
+    assets.warm()
+    mismatched = []
+    for column, order in itertools.product(best_teams.columns, best_teams.order_var):
+        if not np.array_equal(pixels(legacy_render, column, order), pixels(best_teams.render, column, order)):
+            mismatched.append((column, order))
+
+    legacy_ms = timed(legacy_render)
+    batched_ms = timed(best_teams.render)
+    print(f'прежняя отрисовка: {legacy_ms:.0f} мс, пакетная: {batched_ms:.0f} мс, '
+          f'ускорение {legacy_ms / batched_ms:.1f}x')
+    print(f'сортировок с отличием в пикселях: {len(mismatched)}')
+    assert not mismatched, mismatched
+
+
+if __name__ == '__main__':
+    main()
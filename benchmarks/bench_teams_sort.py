@@ -0,0 +1,62 @@
+"""
+Бенчмарк пересортировки таблицы команд: сборка картинки из готовых строк (best_teams.compose)
+против полной отрисовки. Для всех сортировок проверяет, что собранная картинка попиксельно
+совпадает с полной отрисовкой той же таблицы с целым шагом строк.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_teams_sort [пресет]
+"""
+import io
+import itertools
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+import assets
+import best_teams
+import render_options
+
+
+def full_render(column, order, quality):
+    snapshot = best_teams.source()
+    table = best_teams._sort(snapshot.data, column, order)
+    fig, _ = best_teams._draw(table, quality, snap_rows=True)
+    out = io.BytesIO()
+    render_options.save(fig, out, quality, 'png', bbox_inches=best_teams._tight_bbox(fig, quality, snapshot.version))
+    fig.clear()
+    return out
+
+
+def main():
+    quality = sys.argv[1] if len(sys.argv) > 1 else best_teams.DEFAULT_QUALITY
+    assets.warm()
+
+    start = time.perf_counter()
+    best_teams._sprite_sheet(quality, best_teams.source())
+    sheet_ms = (time.perf_counter() - start) * 1000
+
+    compose_ms, render_ms, mismatched = [], [], []
+    for column, order in itertools.product(best_teams.columns, best_teams.order_var):
+        composed = io.BytesIO()
+        start = time.perf_counter()
+        best_teams.compose(column, order, composed, quality)
+        compose_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        rendered = full_render(column, order, quality)
+        render_ms.append((time.perf_counter() - start) * 1000)
+
+        if not np.array_equal(np.asarray(Image.open(composed)), np.asarray(Image.open(rendered))):
+            mismatched.append((column, order))
+
+    print(f'пресет {quality}: строки рисуются один раз за {sheet_ms:.0f} мс')
+    print(f'сортировок: {len(compose_ms)}, сборка из строк: {np.mean(compose_ms):.0f} мс, '
+          f'полная отрисовка: {np.mean(render_ms):.0f} мс (в среднем на картинку, с кодированием PNG)')
+    print(f'сортировок с отличием в пикселях: {len(mismatched)}')
+    assert not mismatched, mismatched
+
+
+if __name__ == '__main__':
+    main()
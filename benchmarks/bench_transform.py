@@ -0,0 +1,49 @@
+"""
+Бенчмарк вывода столбцов format/pos/season: построчный df.apply (как было в shots_map)
+против векторного shots_transform на полном склеенном датасете.
+Заодно сверяет результаты: pos и season должны совпасть полностью, format — везде,
+кроме бросков в меньшинстве (старый код из-за опечатки никогда не выдавал PK).
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_transform
+"""
+import time
+
+import pandas as pd
+
+import shots_store
+import shots_transform
+
+
+def legacy_derive(df):
+    df['format'] = df.apply(lambda row: 'PP' if row['format_PP'] == True else 'PK' if row['format_PP'] == True else 'EV', axis=1)
+    df['pos'] = df.apply(lambda row: 'н' if row['pos_н'] == True else 'з', axis=1)
+    df['season'] = df['season'].apply(lambda x: str(x)[:4])
+    return df
+
+
+def timed(func, df):
+    start = time.perf_counter()
+    out = func(df.copy())
+    return out, time.perf_counter() - start
+
+
+def main():
+    raw = pd.concat([pd.read_csv(path, index_col=0) for path in shots_store.SHOTS_CSV]).reset_index()
+
+    old, old_time = timed(legacy_derive, raw)
+    new, new_time = timed(shots_transform.derive_columns, raw)
+
+    assert (old['pos'].to_numpy() == new['pos'].astype(str).to_numpy()).all()
+    assert (old['season'].to_numpy() == new['season'].astype(str).to_numpy()).all()
+    pk = new['format'] == 'PK'
+    assert (old['format'][~pk].to_numpy() == new['format'][~pk].astype(str).to_numpy()).all()
+
+    print(f'строк: {len(raw)}')
+    print(f'df.apply:         {old_time * 1000:>8.1f} мс')
+    print(f'shots_transform:  {new_time * 1000:>8.1f} мс  ({old_time / new_time:.0f}x)')
+    print(f"format: {new['format'].value_counts().to_dict()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Проверка shots_transform на фиксированном входе: format (включая PK), pos и season
+должны получаться ровно такими, как в ожидаемой таблице.
+
+Запуск из корня проекта:
+    python -m benchmarks.test_transform
+или pytest benchmarks/test_transform.py
+"""
+import pandas as pd
+
+import shots_transform
+
+# Флаги в CSV бывают и bool, и строками; пропуск считается False
+RAW = pd.DataFrame({
+    'format_PP': [True, False, False, 'True', 'False', None],
+    'format_PK': [False, True, False, 'False', 'True', None],
+    'pos_н': [True, False, 'True', 'False', True, None],
+    'season': ['2026_Regular_season', '2025_Regular_season', '2026_Regular_season',
+               '2024_Playoffs', '2025_Regular_season', '2024_Regular_season'],
+})
+
+EXPECTED = pd.DataFrame({
+    'format': pd.Categorical(['PP', 'PK', 'EV', 'PP', 'PK', 'EV'], categories=shots_transform.FORMATS),
+    'pos': pd.Categorical(['н', 'з', 'н', 'з', 'н', 'з'], categories=shots_transform.POSITIONS),
+    'season': pd.Categorical(['2026', '2025', '2026', '2024', '2025', '2024'],
+                             categories=['2024', '2025', '2026']),
+})
+
+
+def derived():
+    df = shots_transform.derive_columns(RAW.copy())
+    return df[['format', 'pos', 'season']].reset_index(drop=True)
+
+
+def test_pk():
+    # Старый построчный код из-за опечатки никогда не выдавал PK
+    pk = derived()['format'] == 'PK'
+    assert pk.tolist() == [False, True, False, False, True, False]
+
+
+def test_derive_columns():
+    df = derived()
+    # Значения сравниваются целиком, словари категорий — отдельно (тип строк зависит от версии pandas)
+    pd.testing.assert_frame_equal(df.astype(str), EXPECTED.astype(str))
+    for col in EXPECTED:
+        assert list(df[col].cat.categories.astype(str)) == list(EXPECTED[col].cat.categories)
+
+
+if __name__ == '__main__':
+    test_pk()
+    test_derive_columns()
+    print('shots_transform: ok')
@@ -1,14 +1,48 @@
 import pandas as pd
-from PIL import Image
-import numpy as np
 import os
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.patches import Rectangle
+import assets
+import data_sources
+import render_cache
+import render_options
 
+GOALIES_CSV = os.path.join('static', 'csv', 'best_goalies.csv')
+# исходные файлы, от которых зависит картинка (для кэша)
+SOURCES = [GOALIES_CSV]
+DEFAULT_QUALITY = 'print'
+# высота фото в строке таблицы при dpi=300, больше пикселей хранить незачем
+PHOTO_PX = 192
 
-def generate(order):
-    df = pd.read_csv(r'static\csv\best_goalies.csv', index_col=0)
+
+def photo_px(quality):
+    """Высота фото в пикселях при сохранении с пресетом quality."""
+    return PHOTO_PX * render_options.dpi(quality) // render_options.dpi('print')
+
+
+data_sources.register('best_players', SOURCES, lambda previous: pd.read_csv(GOALIES_CSV, index_col=0))
+
+
+def source():
+    """Текущий снимок best_goalies.csv (см. data_sources)."""
+    return data_sources.get('best_players')
+
+
+def generate(order, quality=DEFAULT_QUALITY, fmt=render_options.DEFAULT_FORMAT):
+    """
+    Возвращает id картинки таблицы вратарей (топ-10 или боттом-10).
+    Картинка пишется атомарно под уникальным для набора фильтров именем.
+    """
+    snapshot = source()
+    return render_cache.get_or_render('best_players', {'order': order, 'quality': quality, 'fmt': fmt}, snapshot.stamps,
+                                      lambda path: render(order, path, quality, fmt, snapshot), ext=fmt)
+
+
+def render(order, output_path, quality=DEFAULT_QUALITY, fmt=render_options.DEFAULT_FORMAT, snapshot=None):
+    df = (snapshot or source()).data
     print(order)
     if order == '10 худших вратарей по GSAx':
         df = df.tail(10)
@@ -38,7 +72,9 @@ def generate(order):
         y_pos -= row_height
 
     # Создаем фигуру и оси
-    fig, ax = plt.subplots(figsize=(12, 8))
+    fig = Figure(figsize=(12, 8))
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
     ax.axis('off')
     ax.set_facecolor('none')  # ЭТА СТРОКА ДЕЛАЕТ ФОН ПРОЗРАЧНЫМ
     fig.patch.set_alpha(0)
@@ -54,7 +90,7 @@ def generate(order):
                 va='center')
 
         # Рисуем фон для заголовка
-        ax.add_patch(plt.Rectangle((x_coords[j], y_coords[0] - row_height), col_widths[j], row_height,
+        ax.add_patch(Rectangle((x_coords[j], y_coords[0] - row_height), col_widths[j], row_height,
                                    edgecolor='none', facecolor='#f9f9f9'))
     zorder = 0
     # Отрисовка данных и горизонтальных линий
@@ -63,7 +99,7 @@ def generate(order):
 
         # Рисуем фон для строк данных
         bg_color = '#f9f9f9' if i % 2 == 0 else '#f9f9f9'
-        ax.add_patch(plt.Rectangle((0, y_coords[i + 1] - row_height), max_x, row_height,
+        ax.add_patch(Rectangle((0, y_coords[i + 1] - row_height), max_x, row_height,
                                    edgecolor='none', facecolor=bg_color))
 
         # Рисуем тонкую горизонтальную линию
@@ -77,7 +113,7 @@ def generate(order):
             if j == 1:
                 zorder += 1
                 link = str(val)
-                photo_path = os.path.join(r'static\images\players', f'{link}.png')
+                img = assets.photo(link, photo_px(quality))
 
                 # Координаты ячейки
                 left = x_coords[j]
@@ -85,9 +121,8 @@ def generate(order):
                 bottom = y_coords[i + 1] - row_height
                 top = y_coords[i + 1]
 
-                if os.path.exists(photo_path):
-                    img = Image.open(photo_path)
-                    w, h = img.size
+                if img is not None:
+                    h, w = img.shape[:2]
 
                     # Сохраняем пропорции
                     cell_aspect = col_widths[j] / row_height
@@ -107,7 +142,7 @@ def generate(order):
                     image_bottom = y_coords[i + 1] - row_height
 
                     # Вставляем изображение с правильными координатами
-                    ax.imshow(np.array(img),
+                    ax.imshow(img,
                               extent=(image_left, image_left + new_w, image_bottom, image_bottom + new_h),
                               aspect='auto',
                               zorder=zorder + 1)
@@ -143,7 +178,5 @@ def generate(order):
     ax.plot([0, max_x], [y_coords[n_rows] - row_height, y_coords[n_rows] - row_height], c='lightgray', lw=0.5, zorder=1)
 
     # plt.show()
-    filename = f'best_goalies.png'
-    output_path = r'static\images'
-    output_path = os.path.join(output_path, filename)
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
\ No newline at end of file
+    render_options.save(fig, output_path, quality, fmt, bbox_inches='tight')
+    fig.clear()
\ No newline at end of file
@@ -1,196 +1,332 @@
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import io
+import itertools
 import os
-from matplotlib.patches import Rectangle
-import matplotlib.image as mpimg
+from matplotlib.collections import LineCollection, PolyCollection
 from matplotlib.offsetbox import OffsetImage, AnnotationBbox
 from matplotlib.colors import TwoSlopeNorm, LinearSegmentedColormap
+import numpy as np
 import pandas as pd
+from PIL import Image
+import assets
+import data_sources
+import render_cache
+import render_options
 
 columns = {'Команда':'team','Общий рейтинг (Net)':'net','Атакующий рейтинг (Off)':'off','Защитный рейтинг (Def)':'def','Заброшенные шайбы (ЗШ)':'gf','Пропущенный шайбы (ПШ)':'ga','Разница шайб (РШ)':'gd','Ожидаемые шайбы (xG)':'xg','Ожидаемые пропущенные шайбы (xGA)':'xga','Ожидаемая разница шайб (xGD)':'xgd','Шансы на плей-офф':'play-offs'}
 order_var = {'По возрастанию':True,'По убыванию':False}
+TEAMS_CSV = os.path.join('static', 'csv', 'best_teams.csv')
+# исходные файлы, от которых зависит картинка (для кэша)
+SOURCES = [TEAMS_CSV]
+DEFAULT_QUALITY = 'print'
+LOGO_POINTS = 20  # большая сторона логотипа на картинке, pt
 
-def generate(column, order):
-    columns = {'Команда': 'team', 'Общий рейтинг (Net)': 'net', 'Атакующий рейтинг (Off)': 'off',
-               'Защитный рейтинг (Def)': 'def', 'Заброшенные шайбы (ЗШ)': 'gf', 'Пропущенный шайбы (ПШ)': 'ga',
-               'Разница шайб (РШ)': 'gd', 'Ожидаемые шайбы (xG)': 'xg', 'Ожидаемые пропущенные шайбы (xGA)': 'xga',
-               'Ожидаемая разница шайб (xGD)': 'xgd', 'Шансы на плей-офф': 'play-offs'}
-    column = columns[column]
-    prep_table = pd.read_csv(r'static\csv\best_teams.csv',index_col=0)
-    logos_path = r'static\images\logos'
-    # Сортируем по net (по аналогии с рейтингом)
-    prep_table = prep_table.sort_values(column, ascending=order_var[order]).reset_index(drop=True)
-
-    # === нормализация для цветов ===
-    cmap = LinearSegmentedColormap.from_list("blue_white_red", ["#e07a5f", "white", "#8ecae6"])
-    norm = TwoSlopeNorm(vmin=prep_table[['off', 'def', 'net']].min().min(),
-                        vcenter=prep_table[['off', 'def', 'net']].mean().mean(),
-                        vmax=prep_table[['off', 'def', 'net']].max().max())
 
-    # === фигура ===
-    fig, ax = plt.subplots(figsize=(12, len(prep_table) * 0.45))
+def logo_px(quality):
+    """Большая сторона логотипа в пикселях при сохранении с пресетом quality."""
+    return -(-LOGO_POINTS * render_options.dpi(quality) // 72)
+
+
+LOGO_PX = logo_px(DEFAULT_QUALITY)
+data_sources.register('best_teams', SOURCES, lambda previous: pd.read_csv(TEAMS_CSV, index_col=0))
+
+
+def source():
+    """Текущий снимок best_teams.csv (см. data_sources): таблица читается один раз на версию файла."""
+    return data_sources.get('best_teams')
+
+
+def generate(column, order, quality=DEFAULT_QUALITY, fmt=render_options.DEFAULT_FORMAT):
+    """
+    Возвращает id картинки таблицы команд для заданной сортировки.
+    Id выводится из фильтров и данных, картинка пишется атомарно (временный файл + rename),
+    поэтому параллельные запросы не перезаписывают друг другу результат.
+    quality и fmt — пресет разрешения и формат из render_options.
+    """
+    filters = {'column': column, 'order': order, 'quality': quality, 'fmt': fmt}
+    # растровые картинки собираются из готовых строк (см. compose), SVG рисуется целиком
+    draw = render if fmt == 'svg' else compose
+    # ключ и картинка строятся по одному снимку данных, даже если CSV обновится во время отрисовки
+    snapshot = source()
+    return render_cache.get_or_render('best_teams', filters, snapshot.stamps,
+                                      lambda path: draw(column, order, path, quality, fmt, snapshot), ext=fmt)
+
+
+ROW_H = 0.45
+BAR_H = 0.1
+BAR_W = 0.9 ** 1.8  # полная ширина мини-гистограммы
+# мини-гистограммы: (столбец, левый край, цвет, обратная шкала — меньше значит лучше)
+BARS = [('gf', 2.95, '#219ebc', False), ('ga', 4.25, '#8ecae6', True),
+        ('xg', 5.95, '#99582a', False), ('xga', 7.4, '#e07a5f', True)]
+RATINGS = ['off', 'def', 'net']
+RATING_X = 9.55
+RATING_W = 0.8
+_bboxes = {}  # (данные, высота фигуры, пресет) -> обрезка картинки в дюймах
+_sprites = {}  # (данные, пресет) -> см. _sprite_sheet
+
+# Неизменная часть таблицы: заголовки и разделители. Координаты по оси y отсчитываются от верха (y = 1)
+HEADER_TEXTS = [
+    (-0.9, 0.4, "Команда", 'left', 'bold'),
+    (2.375, 0.4, "Плей-офф", 'center', 'bold'),
+    (4.4, 0.75, "Шайбы", 'center', 'bold'),
+    (7.54, 0.75, "Показатели xG", 'center', 'bold'),
+    (10.62, 0.75, "Рейтинг", 'center', 'bold'),
+    (3.35, 0.4, "ЗШ", 'center', 'normal'),
+    (4.65, 0.4, "ПШ", 'center', 'normal'),
+    (5.6, 0.4, "РШ", 'center', 'normal'),
+    (6.45, 0.4, "xG", 'center', 'normal'),
+    (7.85, 0.4, "xGA", 'center', 'normal'),
+    (9.07, 0.4, "xGD", 'center', 'normal'),
+] + [(RATING_X + j * RATING_W + 0.35, 0.4, label, 'center', 'normal') for j, label in enumerate(['Off', 'Def', 'Net'])]
+HEADER_LINES = [  # (x, y, цвет, толщина, zorder)
+    ([-1.5, 12], [0.25, 0.25], 'black', 1, 2),
+    ([2.85, 12], [0.65, 0.65], '#999999', 0.75, 2),
+] + [([x, x], [0.25, -21.5 * ROW_H], 'black', 0.7, 11) for x in [1.9, 2.85, 5.9, 9.49, 12.55]]
+
+
+def render(column, order, output_path, quality=DEFAULT_QUALITY, fmt=render_options.DEFAULT_FORMAT, snapshot=None):
+    """
+    Рисует таблицу команд.
+
+    Однотипные элементы всех строк собираются в коллекции: все серые подложки гистограмм,
+    столбики каждого цвета и ячейки рейтинга рисуются одним artist'ом вместо сотен
+    отдельных barh/Rectangle. Картинка совпадает с прежней попиксельно
+    (см. benchmarks/bench_teams.py).
+
+    Args:
+        column (str): Столбец сортировки (ключ columns).
+        order (str): Направление сортировки (ключ order_var).
+        output_path (str | file): Куда сохранить картинку.
+        quality (str): Пресет разрешения из render_options.
+        fmt (str): Формат из render_options.
+        snapshot (Snapshot): Снимок данных (см. data_sources); по умолчанию — текущий.
+    """
+    snapshot = snapshot or source()
+    table = _sort(snapshot.data, column, order)
+    fig, _ = _draw(table, quality)
+    bbox = 'tight' if fmt == 'svg' else _tight_bbox(fig, quality, snapshot.version)
+    render_options.save(fig, output_path, quality, fmt, bbox_inches=bbox)
+    fig.clear()
+
+
+def compose(column, order, output_path, quality=DEFAULT_QUALITY, fmt=render_options.DEFAULT_FORMAT, snapshot=None):
+    """
+    Собирает растровую таблицу команд из готовых строк, ничего не перерисовывая.
+
+    При смене сортировки меняется только порядок строк, поэтому таблица один раз рисуется
+    в порядке CSV (см. _sprite_sheet), а здесь её строки переставляются в нужном порядке
+    прямо в пикселях. Результат совпадает попиксельно с render той же таблицы,
+    нарисованной с шагом строк, округлённым до целого пикселя (отличие от render — не больше
+    полупикселя на строку по высоте).
+
+    Args:
+        column (str): Столбец сортировки (ключ columns).
+        order (str): Направление сортировки (ключ order_var).
+        output_path (str | file): Куда сохранить картинку.
+        quality (str): Пресет разрешения из render_options.
+        fmt (str): Растровый формат из render_options ('png' или 'webp').
+        snapshot (Snapshot): Снимок данных (см. data_sources); по умолчанию — текущий.
+    """
+    table, image, top, bottom, pitch = _sprite_sheet(quality, snapshot or source())
+    rows = _sort(table, column, order).index.to_numpy()
+    out = image.copy()
+    for slot, row in enumerate(rows):
+        out[top + slot * pitch:bottom + slot * pitch] = image[top + row * pitch:bottom + row * pitch]
+    dpi = render_options.dpi(quality)
+    pil_kwargs = render_options.FORMATS[fmt][1].get('pil_kwargs', {})
+    Image.fromarray(out).save(output_path, format=fmt.upper(), dpi=(dpi, dpi), **pil_kwargs)
+
+
+def generate_all(quality=DEFAULT_QUALITY, fmt=render_options.DEFAULT_FORMAT):
+    """Готовит картинки для всех сортировок (столбцы × направления), возвращает их id."""
+    return [generate(column, order, quality, fmt) for column, order in itertools.product(columns, order_var)]
+
+
+def _sort(table, column, order):
+    return table.sort_values(columns[column], ascending=order_var[order])
+
+
+def _draw(table, quality, snap_rows=False):
+    """
+    Рисует таблицу на новой фигуре.
+
+    Args:
+        table (pd.DataFrame): Строки таблицы в порядке отрисовки.
+        quality (str): Пресет разрешения (нужен для размера логотипов и округления шага строк).
+        snap_rows (bool): Подогнать высоту фигуры так, чтобы шаг строк был целым числом пикселей.
+
+    Returns:
+        tuple: (Figure, Axes).
+    """
+    n = len(table)
+    ys = -np.arange(n) * ROW_H
+    height = n * ROW_H
+    if snap_rows:
+        params = matplotlib.rcParams
+        axes_share = params['figure.subplot.top'] - params['figure.subplot.bottom']
+        pitch = ROW_H * axes_share * height * render_options.dpi(quality) / (n * ROW_H + 0.8)
+        height *= round(pitch) / pitch
+
+    fig = Figure(figsize=(12, height))
+    # фигура со своей канвой, без pyplot (см. gg_rink)
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
     ax.set_facecolor("#ffffff")
     ax.axis("off")
 
-    row_h = 0.45
-    y = 1
-
-    # лимиты для мини-гистограмм
-    gf_max = prep_table['gf'].max()
-    gf_min = prep_table['gf'].min()
-    ga_max = prep_table['ga'].max()
-    ga_min = prep_table['ga'].min()
-    xg_max = prep_table['xg'].max()
-    xg_min = prep_table['xg'].min()
-    xga_max = prep_table['xga'].max()
-    xga_min = prep_table['xga'].min()
-    # ax.axhline(y-0.75, zorder=1, color='black', lw=1)
-    ax.plot([-1.5, 12], [y - 0.75, y - 0.75], color='black', lw=1)
-    ax.plot([2.85, 12], [y - 0.35, y - 0.35], color='#999999', lw=0.75)
-    ax.plot([1.9, 1.9], [y - 0.75, -21.5 * row_h], zorder=11, color='black', lw=0.7)
-    ax.plot([2.85, 2.85], [y - 0.75, -21.5 * row_h], zorder=11, color='black', lw=0.7)
-    ax.plot([5.9, 5.9], [y - 0.75, -21.5 * row_h], zorder=11, color='black', lw=0.7)
-    ax.plot([9.49, 9.49], [y - 0.75, -21.5 * row_h], zorder=11, color='black', lw=0.7)
-    ax.plot([12.55, 12.55], [y - 0.75, -21.5 * row_h], zorder=11, color='black', lw=0.7)
-    # === отрисовка ===
-    for i, row in prep_table.iterrows():
-        y = -i * row_h
-        ax.axhline(y - row_h / 2, zorder=1, color='#f7f7f7', lw=0.75)
-
-        # чередующийся фон
-        # if i % 2 == 0:
-        #     ax.add_patch(Rectangle((-0.2, y - row_h / 2), 12.3, row_h,
-        #                            facecolor="#fafafa", edgecolor="none"))
-        max_size = 80  # ограничение по ширине/высоте
-        logo_path = os.path.join(logos_path, f"{row['team_name_long']}.png")
-        if os.path.exists(logo_path):
-            logo_img = mpimg.imread(logo_path)
-
-            # Определяем реальный размер изображения
-            h, w = logo_img.shape[:2]
-
-            # Вычисляем коэффициент масштабирования
-            scale = min(max_size / w, max_size / h)
-
-            # OffsetImage работает с "zoom", а не пикселями
-            # Подбираем zoom как отношение к 1.0 (на глаз подгоняется под DPI matplotlib)
-            zoom = scale / 4
-
-            imagebox = OffsetImage(logo_img, zoom=zoom)
-            imagebox.image.axes = ax
-
-            ab = AnnotationBbox(
-                imagebox,
-                (-.74, y),  # позиция
-                xycoords='data',
-                frameon=False,
-                zorder=9
-                # box_alignment=(1, 0.5)
-            )
-
-            ax.add_artist(ab)
+    _draw_template(ax)
+    ax.add_collection(LineCollection([[(0, y - ROW_H / 2), (1, y - ROW_H / 2)] for y in ys],
+                                     transform=ax.get_yaxis_transform(), colors='#f7f7f7', linewidths=0.75, capstyle='projecting',
+                                     zorder=1))
+    _draw_bars(ax, table, ys)
+    _draw_ratings(ax, table, ys)
+    _draw_logos(ax, table, ys, logo_px(quality))
+    _draw_texts(ax, table, ys)
+
+    ax.set_xlim(-0.9, 11.9)
+    ax.set_ylim(-n * ROW_H, 0.8)
+    return fig, ax
+
+
+def _tight_bbox(fig, quality, version):
+    # bbox_inches='tight' перед сохранением прогоняет лишнюю отрисовку без вывода ради обрезки полей.
+    # Поля таблицы определяются раскладкой (размер фигуры, dpi) и набором команд, а не сортировкой,
+    # поэтому обрезку считаем один раз на версию данных и переиспользуем для всех сортировок.
+    key = (version, fig.get_figheight(), quality)
+    bbox = _bboxes.get(key)
+    if bbox is None:
+        fig.dpi = render_options.dpi(quality)
+        fig.draw_without_rendering()
+        bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(matplotlib.rcParams['savefig.pad_inches'])
+        _bboxes[key] = bbox
+    return bbox
+
+
+def _sprite_sheet(quality, snapshot):
+    """
+    Таблица, нарисованная один раз на версию данных в порядке CSV, и разметка её строк.
+
+    Returns:
+        tuple: (таблица, RGBA-картинка, первая и последняя+1 строка пикселей внутренней части
+                первой строки таблицы, шаг строк в пикселях). Внутренняя часть не задевает
+                разделители между строками, они остаются на своих местах.
+    """
+    key = (snapshot.version, quality)
+    sheet = _sprites.get(key)
+    if sheet is not None:
+        return sheet
+
+    table = snapshot.data.reset_index(drop=True)
+    fig, ax = _draw(table, quality, snap_rows=True)
+    bbox = _tight_bbox(fig, quality, snapshot.version)
+    buffer = io.BytesIO()
+    render_options.save(fig, buffer, quality, 'png', bbox_inches=bbox)
+    image = np.array(Image.open(buffer))
+
+    # Положение строк в пикселях сохранённой картинки (ось y картинки направлена вниз от bbox.y1)
+    dpi = render_options.dpi(quality)
+    fig.dpi = dpi
+    to_px = lambda y: image.shape[0] - (ax.transData.transform((0, y))[1] - bbox.y0 * dpi)
+    pitch = round(to_px(-ROW_H) - to_px(0))
+    # разделитель строки (0.75 pt) плюс пиксель сглаживания с каждой стороны
+    margin = 0.75 * dpi / 72 / 2 + 1
+    top = int(np.ceil(to_px(ROW_H / 2) + margin))
+    bottom = int(np.floor(to_px(-ROW_H / 2) - margin))
+    fig.clear()
+
+    # Листы прежних версий данных больше не понадобятся, а весят мегабайты
+    for old in [k for k in _sprites if k[0] != snapshot.version]:
+        del _sprites[old]
+    sheet = _sprites[key] = (table, image, top, bottom, pitch)
+    return sheet
+
+
+def _draw_template(ax):
+    for xs, ys, color, lw, zorder in HEADER_LINES:
+        ax.plot(xs, ys, color=color, lw=lw, zorder=zorder)
+    for x, y, text, ha, weight in HEADER_TEXTS:
+        ax.text(x, y, text, ha=ha, fontsize=10, weight=weight, color="#111")
+
+
+def _bar_widths(values, reverse):
+    # Ширина столбика нелинейна (степень 1.8), как и раньше; для пропущенных шкала обратная
+    top = values.max()
+    share = 1 + values.min() / top - values / top if reverse else values / top
+    return (share * 0.9) ** 1.8
+
 
+def _rects(left, ys, widths, height):
+    bottom, top = ys - height / 2, ys + height / 2
+    right = left + widths
+    return np.stack([np.column_stack([left, bottom]), np.column_stack([left, top]),
+                     np.column_stack([right, top]), np.column_stack([right, bottom])], axis=1)
+
+
+def _draw_bars(ax, table, ys):
+    lefts = np.array([left for _, left, _, _ in BARS])
+    # подложки всех столбцов — одна коллекция
+    background = _rects(np.repeat(lefts, len(ys)), np.tile(ys, len(BARS)), np.full(len(ys) * len(BARS), BAR_W), BAR_H)
+    ax.add_collection(PolyCollection(background, facecolors='#E1E1E1', edgecolors='none'))
+    for col, left, color, reverse in BARS:
+        widths = _bar_widths(table[col].to_numpy(dtype=float), reverse)
+        ax.add_collection(PolyCollection(_rects(np.full(len(ys), left), ys, widths, BAR_H),
+                                         facecolors=color, edgecolors='none'))
+
+
+def _draw_ratings(ax, table, ys):
+    values = table[RATINGS].to_numpy(dtype=float)
+    cmap = LinearSegmentedColormap.from_list("blue_white_red", ["#e07a5f", "white", "#8ecae6"])
+    norm = TwoSlopeNorm(vmin=values.min(), vcenter=values.mean(axis=0).mean(), vmax=values.max())
+    cells = np.concatenate([_rects(np.full(len(ys), RATING_X + j * RATING_W), ys, np.full(len(ys), RATING_W - 0.05), 0.32)
+                            for j in range(len(RATINGS))])
+    # одна цветная сетка ячеек: цвет берётся из массива значений через cmap/norm
+    ax.add_collection(PolyCollection(cells, array=values.T.ravel(), cmap=cmap, norm=norm,
+                                     edgecolors='lightgray', linewidths=0.5, joinstyle='miter'))
+
+
+def _draw_logos(ax, table, ys, max_px):
+    for team, y in zip(table['team_name_long'], ys):
+        logo_img = assets.logo(team, max_px)
+        if logo_img is None:
+            continue
+        # Логотип уже уменьшен до нужного числа пикселей, zoom переводит его пиксели в LOGO_POINTS
+        h, w = logo_img.shape[:2]
+        imagebox = OffsetImage(logo_img, zoom=LOGO_POINTS / max(w, h))
+        imagebox.image.axes = ax
+        ax.add_artist(AnnotationBbox(imagebox, (-.74, y), xycoords='data', frameon=False, zorder=9))
+
+
+def _signed(value, fmt):
+    color = 'green' if value > 0 else 'red' if value < 0 else 'black'
+    return f"{'+' if value > 0 else ''}{value:{fmt}}", color
+
+
+def _draw_texts(ax, table, ys):
+    for row, y in zip(table.to_dict('records'), ys):
         # Команда
-        ax.text(-0.51, y, f"{row['team']}",
-                ha='left', va='center', fontsize=10, color="black")
+        ax.text(-0.51, y, f"{row['team']}", ha='left', va='center', fontsize=10, color="black")
         ax.text(-0.51, y, " " * (2 * len(row['team']) + 4) + f"{row['record']}",
                 ha='left', va='center', fontsize=9, color="#222", alpha=0.8)
 
         # Плей-офф
-        ax.text(2.375, y,
-                f"{int(row['play-offs']) if row['play-offs'] >= 1 else '>0' if row['play-offs'] > 0 else '>0'}%",
-                ha='center', va='center', fontsize=10, color="#444", alpha=0.5 + 0.5 * row['play-offs'] / 100)
-
-        # Шайбы — симметричная мини-гистограмма
-        base_x = 2.95
-        base_x1 = 4.25
-        gf_width = (row['gf'] / gf_max * 0.9) ** 1.8
-        ga_width = ((1 + ga_min / (ga_max) - (row['ga'] / ga_max)) * 0.9) ** 1.8
-        ax.barh(y, 0.9 ** 1.8, height=0.1, color="#E1E1E1", left=base_x)
-        ax.barh(y, gf_width, height=0.1, color="#219ebc", left=base_x)
-
-        ax.barh(y, 0.9 ** 1.8, height=0.1, color="#E1E1E1", left=base_x1)
-        ax.barh(y, ga_width, height=0.1, color="#8ecae6", left=base_x1)
-
-        ax.text(base_x + 0.9, y, f"{int(row['gf'])}",
-                ha='left', va='center', fontsize=9, color="#333")
-        ax.text(base_x1 + 0.9, y, f"{int(row['ga'])}",
-                ha='left', va='center', fontsize=9, color="#333")
-        if row['gd'] > 0:
-            color = 'green'
-            text = f"+{int(row['gd'])}"
-        elif row['gd'] < 0:
-            color = 'red'
-            text = f"{int(row['gd'])}"
-        else:
-            color = 'black'
-            text = f"{int(row['gd'])}"
-        ax.text(base_x1 + 1.25, y, text,
-                ha='left', va='center', fontsize=9, color=color)
-        # xG — симметрично, красноватые оттенки
-        base_x = 5.95
-        base_x1 = 7.4
-        xg_width = (row['xg'] / xg_max * 0.9) ** 1.8
-        xga_width = ((1 + xga_min / xga_max - row['xga'] / xga_max) * 0.9) ** 1.8
-        ax.barh(y, 0.9 ** 1.8, height=0.1, color="#E1E1E1", left=base_x)
-        ax.barh(y, xg_width, height=0.1, color="#99582a", left=base_x)
-        ax.barh(y, 0.9 ** 1.8, height=0.1, color="#E1E1E1", left=base_x1)
-        ax.barh(y, xga_width, height=0.1, color="#e07a5f", left=base_x1)
-
-        ax.text(base_x + 0.9, y, f"{row['xg']:.1f}",
-                ha='left', va='center', fontsize=9, color="#333")
-        ax.text(base_x1 + 0.9, y, f"{row['xga']:.1f}",
-                ha='left', va='center', fontsize=9, color="#333")
-        if row['xgd'] > 0:
-            color = 'green'
-            text = f"+{row['xgd']:.1f}"
-        elif row['xgd'] < 0:
-            color = 'red'
-            text = f"{row['xgd']:.1f}"
-        else:
-            color = 'black'
-            text = f"{row['xgd']:.1f}"
-        ax.text(base_x1 + 1.5, y, text,
-                ha='left', va='center', fontsize=9, color=color)
-        # Блок рейтингов: три прямоугольника (Off / Def / Net)
-        start_x = 9.55
-        w = 0.8
-        for j, col in enumerate(['off', 'def', 'net']):
-            val = row[col]
-            color = cmap(norm(val))
-            ax.add_patch(Rectangle((start_x + j * w, y - 0.16), w - 0.05, 0.32,
-                                   facecolor=color, edgecolor='lightgray', lw=0.5))
-            ax.text(start_x + j * w + (w - 0.05) / 2, y, f"{val:.1f}",
-                    ha='center', va='center', fontsize=10, color="#111")
+        play_offs = row['play-offs']
+        ax.text(2.375, y, f"{int(play_offs) if play_offs >= 1 else '>0'}%",
+                ha='center', va='center', fontsize=10, color="#444", alpha=0.5 + 0.5 * play_offs / 100)
 
-    # === заголовки ===
-    ax.text(-0.9, 0.4, "Команда", ha='left', fontsize=10, weight='bold', color="#111")
-    ax.text(2.375, 0.4, "Плей-офф", ha='center', fontsize=10, weight='bold', color="#111")
-    ax.text(4.4, 0.75, "Шайбы", ha='center', fontsize=10, weight='bold', color="#111")
-    ax.text(7.54, 0.75, "Показатели xG", ha='center', fontsize=10, weight='bold', color="#111")
-    ax.text(10.62, 0.75, "Рейтинг", ha='center', fontsize=10, weight='bold', color="#111")
-    ax.text(3.35, 0.4, "ЗШ", ha='center', fontsize=10, color="#111")
-    ax.text(4.65, 0.4, "ПШ", ha='center', fontsize=10, color="#111")
-    ax.text(5.6, 0.4, "РШ", ha='center', fontsize=10, color="#111")
-    ax.text(6.45, 0.4, "xG", ha='center', fontsize=10, color="#111")
-    ax.text(7.85, 0.4, "xGA", ha='center', fontsize=10, color="#111")
-    ax.text(9.07, 0.4, "xGD", ha='center', fontsize=10, color="#111")
-
-    # ax.text(-0.9, 1.35, "КХЛ 2025/26 Командные рейтинги и статистика", weight='bold', ha='left', fontsize=16,
-    #         color="#111")
-    # ax.text(11.9, 1.45, "t.me/ice_forecast", ha='right', fontsize=10, color="#111", alpha=0.75)
-
-    # подписи над прямоугольниками рейтинга
-    rating_labels = ['Off', 'Def', 'Net']
-    for j, lbl in enumerate(rating_labels):
-        ax.text(9.55 + j * 0.8 + 0.35, 0.4, lbl, ha='center', fontsize=10, color="#111")
+        # Подписи мини-гистограмм и разницы
+        ax.text(3.85, y, f"{int(row['gf'])}", ha='left', va='center', fontsize=9, color="#333")
+        ax.text(5.15, y, f"{int(row['ga'])}", ha='left', va='center', fontsize=9, color="#333")
+        text, color = _signed(int(row['gd']), 'd')
+        ax.text(5.5, y, text, ha='left', va='center', fontsize=9, color=color)
+        ax.text(6.85, y, f"{row['xg']:.1f}", ha='left', va='center', fontsize=9, color="#333")
+        ax.text(8.3, y, f"{row['xga']:.1f}", ha='left', va='center', fontsize=9, color="#333")
+        text, color = _signed(row['xgd'], '.1f')
+        ax.text(8.9, y, text, ha='left', va='center', fontsize=9, color=color)
 
-    ax.set_xlim(-0.9, 11.9)
-    ax.set_ylim(-len(prep_table) * row_h, 0.8)
-    # plt.tight_layout()
-    # plt.show()
-    name = f'best_teams.png'
-    filepath = r'static\images'
-    filename = os.path.join(filepath, name)
-    plt.savefig(filename, dpi=300, bbox_inches='tight')
\ No newline at end of file
+        # Значения рейтингов
+        for j, col in enumerate(RATINGS):
+            ax.text(RATING_X + j * RATING_W + (RATING_W - 0.05) / 2, y, f"{row[col]:.1f}",
+                    ha='center', va='center', fontsize=10, color="#111")
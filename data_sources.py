@@ -0,0 +1,90 @@
+import collections
+import hashlib
+import json
+import os
+import threading
+
+import render_cache
+
+# Общий слой исходных данных для модулей отрисовки.
+# Каждый источник (CSV таблиц, датасет бросков) загружается один раз и хранится как снимок
+# с версией. При обращении проверяются только mtime и размер файлов (os.stat); если файл
+# изменился, данные перечитываются и новый снимок подменяет старый одним присваиванием.
+# Запрос берёт снимок один раз в начале и рисует по нему до конца: обновление файла
+# посреди отрисовки не смешивает в одной картинке старые и новые данные.
+# Данные снимка не меняются после загрузки — их можно только читать.
+
+# version — sha1 от stamps; stamps — {путь: отпечаток содержимого}, по ним же строится ключ кэша картинок
+Snapshot = collections.namedtuple('Snapshot', ['name', 'version', 'stamps', 'data'])
+
+_sources = {}    # имя -> (пути, загрузчик)
+_locks = {}      # имя -> блокировка загрузки: долгая загрузка одного источника не держит остальные
+_snapshots = {}  # имя -> (mtime/размер файлов, Snapshot)
+
+
+def register(name, paths, load):
+    """
+    Регистрирует источник данных. Сами файлы читаются при первом get().
+
+    Args:
+        name (str): Имя источника.
+        paths (list): Файлы, от которых зависят данные.
+        load (callable): load(previous) -> данные; previous — прежний Snapshot или None
+                         (позволяет догрузить изменения, а не читать всё заново).
+    """
+    _sources[name] = (list(paths), load)
+    _locks[name] = threading.Lock()
+
+
+def get(name):
+    """
+    Текущий снимок источника; перечитывает данные, если файлы изменились.
+
+    Args:
+        name (str): Имя источника из register().
+
+    Returns:
+        Snapshot: (name, version, stamps, data).
+    """
+    paths, load = _sources[name]
+    meta = _stat(paths)
+    current = _snapshots.get(name)
+    if current is not None and current[0] == meta:
+        return current[1]
+
+    # Загрузчик может сам читать другой источник (сетки плотности строятся по снимку бросков)
+    with _locks[name]:
+        # Пока ждали блокировку, снимок мог обновить другой поток
+        current = _snapshots.get(name)
+        if current is not None and current[0] == meta:
+            return current[1]
+        stamps = {path: render_cache.file_stamp(path) for path in paths}
+        previous = current[1] if current is not None else None
+        if previous is not None and previous.stamps == stamps:
+            # Файл переписан тем же содержимым: данные прежние
+            snapshot = previous
+        else:
+            snapshot = Snapshot(name, _version(stamps), stamps, load(previous))
+        _snapshots[name] = (meta, snapshot)
+        return snapshot
+
+
+def version(name):
+    """Версия данных источника без их загрузки (для ключей кэшей и диагностики)."""
+    paths, _ = _sources[name]
+    return _version({path: render_cache.file_stamp(path) for path in paths})
+
+
+def _version(stamps):
+    return hashlib.sha1(json.dumps(stamps, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _stat(paths):
+    meta = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            meta.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            meta.append(None)
+    return tuple(meta)
@@ -0,0 +1,25 @@
+# Варианты фильтров страниц /teams, /players и /shots.
+# Отдельный модуль, а не app.py: их читает и prewarm.py, а импорт app оттуда под python app.py
+# (где приложение — __main__) выполнил бы app.py второй раз и создал второе Flask-приложение.
+
+#для странички best_teams
+COLUMNS = ['Команда','Общий рейтинг (Net)','Атакующий рейтинг (Off)','Защитный рейтинг (Def)','Заброшенные шайбы (ЗШ)','Пропущенный шайбы (ПШ)','Разница шайб (РШ)','Ожидаемые шайбы (xG)','Ожидаемые пропущенные шайбы (xGA)','Ожидаемая разница шайб (xGD)','Шансы на плей-офф']
+ORDER_VAR = ['По возрастанию','По убыванию']
+#для странички best_goalies
+ORDER_VAR_G = ['10 лучших вратарей по GSAx','10 худших вратарей по GSAx']
+#для странички shot_map
+SEASON_VAR = ['2024','2025','2026','All']
+STAGE_VAR = ['regular season', 'All']
+POS_VAR = ['нападающие','защитники','All']
+FORMAT_VAR = ['EV','PP','PK','All']
+GRAPHIC_VAR = ['Тепловая карта','Точечное распределение','Зоны']
+MAP_TYPE_VAR_POINTS = ['Броски','Голы','xG']
+MAP_TYPE_VAR_HEAT = ['Броски','Голы','xG']
+MAP_TYPE_VAR_ZONES = ['Броски','Голы','xG','Голы − xG']
+# тип графика -> (задача render_service, доступные типы карты)
+GRAPHIC_TASKS = {
+    'Тепловая карта': ('generate_heat_map', MAP_TYPE_VAR_HEAT),
+    'Точечное распределение': ('generate_heat_map_points', MAP_TYPE_VAR_POINTS),
+    'Зоны': ('generate_zone_map', MAP_TYPE_VAR_ZONES),
+}
+TEAM_VAR = ['All', 'Авангард', 'Автомобилист', 'Адмирал', 'Ак Барс', 'Амур', 'Барыс', 'Динамо М', 'Динамо Мн', 'Лада', 'Локомотив', 'Металлург', 'Нефтехимик', 'Салават Юлаев', 'Северсталь', 'Сибирь', 'Трактор', 'ЦСКА', 'Шанхайские Драконы', 'СКА', 'Спартак', 'Торпедо', 'ХК Сочи']
@@ -0,0 +1,120 @@
+import bisect
+
+import numpy as np
+
+# Поиск игрока по началу имени для поля player на странице /shots.
+# Имена нормализуются (регистр, ё -> е, лишние пробелы) и кладутся в отсортированный массив
+# ключей: полное имя «Фамилия Имя» и отдельно каждое слово после фамилии, чтобы игрока
+# находили и по фамилии, и по имени. Запрос — два бинарных поиска по массиву (bisect),
+# без прохода по всем строкам датасета.
+DEFAULT_LIMIT = 10
+_FOLD = str.maketrans({'ё': 'е'})
+_END = '\uffff'  # больше любой буквы: граница диапазона ключей с заданным началом
+
+
+def normalize(text):
+    """Приводит имя или запрос к виду ключа: нижний регистр, ё -> е, одиночные пробелы."""
+    return ' '.join(str(text).lower().translate(_FOLD).split())
+
+
+def build(df):
+    """
+    Строит индекс игроков по датасету бросков.
+
+    Args:
+        df (pd.DataFrame): Датасет из shots_store.load() (категориальные player_name, team, season).
+
+    Returns:
+        dict: 'keys' и 'ids' — отсортированные ключи и номера игроков; 'names' — имена по номеру
+              (он же код категории player_name); 'exact' — {нормализованное имя: номер};
+              'teams', 'seasons' — множества значений по номеру; 'shots' — число бросков.
+    """
+    names = [str(name) for name in df['player_name'].cat.categories]
+    codes = df['player_name'].cat.codes.to_numpy()
+    entries = []
+    exact = {}
+    for player, name in enumerate(names):
+        words = normalize(name).split(' ')
+        exact.setdefault(' '.join(words), player)
+        entries += [(' '.join(words[i:]), player) for i in range(len(words))]
+    entries.sort()
+    return {
+        'keys': [key for key, _ in entries],
+        'ids': [player for _, player in entries],
+        'names': names,
+        'exact': exact,
+        'teams': _values_by_player(codes, df['team'], len(names)),
+        'seasons': _values_by_player(codes, df['season'], len(names)),
+        'shots': np.bincount(codes[codes >= 0], minlength=len(names)),
+    }
+
+
+def _values_by_player(codes, column, n_players):
+    # Уникальные пары (игрок, значение) одним np.unique вместо группировки по строкам
+    values = column.cat.codes.to_numpy().astype(np.int64)
+    categories = [str(v) for v in column.cat.categories]
+    pairs = np.unique(codes.astype(np.int64) * len(categories) + values)
+    result = [set() for _ in range(n_players)]
+    for pair in pairs:
+        player, value = divmod(int(pair), len(categories))
+        if player >= 0 and value >= 0:
+            result[player].add(categories[value])
+    return [frozenset(values) for values in result]
+
+
+def _prefix_ids(index, query):
+    lo = bisect.bisect_left(index['keys'], query)
+    hi = bisect.bisect_left(index['keys'], query + _END, lo)
+    return dict.fromkeys(index['ids'][lo:hi])  # без повторов, в порядке ключей
+
+
+def search(index, query, team=None, season=None, limit=DEFAULT_LIMIT):
+    """
+    Игроки, у которых фамилия, имя или полное имя начинается с query.
+
+    Args:
+        index (dict): Индекс из build().
+        query (str): Начало имени в любом регистре, ё и е не различаются.
+        team (str | list | None): Только игроки, бросавшие за эту команду (за любую из списка;
+                                  'All'/None — все).
+        season (str | list | None): Только игроки с бросками в этом сезоне (в любом из списка;
+                                    'All'/None — все).
+        limit (int): Сколько игроков вернуть.
+
+    Returns:
+        list: [{'name', 'teams', 'seasons', 'shots'}], сначала игроки с большим числом бросков.
+    """
+    query = normalize(query)
+    if not query:
+        return []
+    teams, seasons = _wanted(team), _wanted(season)
+    players = [p for p in _prefix_ids(index, query)
+               if (teams is None or not teams.isdisjoint(index['teams'][p]))
+               and (seasons is None or not seasons.isdisjoint(index['seasons'][p]))]
+    players.sort(key=lambda p: (-index['shots'][p], index['names'][p]))
+    return [{'name': index['names'][p], 'teams': sorted(index['teams'][p]),
+             'seasons': sorted(index['seasons'][p]), 'shots': int(index['shots'][p])} for p in players[:limit]]
+
+
+def _wanted(value):
+    # None — без фильтра, иначе множество подходящих значений
+    values = [value] if isinstance(value, str) or value is None else list(value)
+    values = [v.strip() for v in values if v and v.strip()]
+    if not values or 'All' in values:
+        return None
+    return set(values)
+
+
+def resolve(index, text):
+    """
+    Имя игрока в датасете по введённому тексту: точное совпадение без учёта регистра и ё,
+    иначе единственный игрок, чьё имя или фамилия начинается с text.
+
+    Returns:
+        str | None: Имя из датасета или None, если игрок не найден или подходит несколько.
+    """
+    query = normalize(text)
+    if query in index['exact']:
+        return index['names'][index['exact'][query]]
+    players = list(_prefix_ids(index, query)) if query else []
+    return index['names'][players[0]] if len(players) == 1 else None
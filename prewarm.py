@@ -0,0 +1,173 @@
+import collections
+import importlib
+import itertools
+import os
+import sys
+import threading
+import time
+
+import page_options
+import render_cache
+import render_service
+
+# Предварительная отрисовка всех конечных комбинаций фильтров.
+# Пространства фильтров /teams и /players крошечные, а у /shots без выбора игрока — конечное,
+# поэтому все картинки можно нарисовать заранее в пуле render_service и положить в кэш:
+# после обновления данных первый пользователь не ждёт холодной отрисовки.
+GROUPS = ['teams', 'players', 'shots']
+WATCH_INTERVAL = 60  # как часто фоновая задача проверяет, не обновились ли исходные CSV, с
+PROGRESS_STEP = 0.05  # печатать прогресс каждые 5% задач
+# Какую долю render_cache.MAX_CACHE_BYTES может занять прогрев: остальное — картинкам пользователей
+# (карты по игрокам, другие разрешения). Сверх этого прогрев сам вытеснял бы свои же картинки,
+# начиная с самых популярных, нарисованных первыми
+PREWARM_SHARE = 0.5
+
+
+def combinations(groups=GROUPS):
+    """
+    Перебирает комбинации фильтров из констант page_options.py.
+
+    Args:
+        groups (list): Какие страницы прогревать: 'teams', 'players', 'shots'.
+
+    Yields:
+        tuple: (имя задачи render_service, фильтры).
+    """
+    if 'teams' in groups:
+        for column, order in itertools.product(page_options.COLUMNS, page_options.ORDER_VAR):
+            yield 'best_teams', {'column': column, 'order': order}
+    if 'players' in groups:
+        for order in page_options.ORDER_VAR_G:
+            yield 'best_players', {'order': order}
+    if 'shots' in groups:
+        # Этап пока не фильтруется (см. shots_data.select_shots): картинки для разных этапов одинаковы,
+        # поэтому прогреваем только этап, выбранный в форме по умолчанию
+        stage = page_options.STAGE_VAR[0]
+        # Сначала карты по всем командам — их открывают чаще всего, потом по каждой команде
+        for team, season, pos, format, graphic in itertools.product(
+                page_options.TEAM_VAR, page_options.SEASON_VAR, page_options.POS_VAR,
+                page_options.FORMAT_VAR, page_options.GRAPHIC_VAR):
+            task, map_types = page_options.GRAPHIC_TASKS[graphic]
+            for map_type in map_types:
+                yield task, dict(season=season, stage=stage, pos=pos, format=format, graphic=graphic,
+                                 map_type=map_type, team=team, player='')
+
+
+def _log(message):
+    print(message, flush=True)
+
+
+def run(groups=GROUPS, window=None, budget=None, log=_log):
+    """
+    Рисует комбинации в пуле процессов и заполняет кэш картинок.
+
+    Задачи подаются окном: в очереди пула не больше window задач одновременно,
+    поэтому запросы пользователей, пришедшие во время прогрева, не ждут за тысячами задач.
+    Комбинации идут от популярных к редким, и прогрев останавливается, когда картинки
+    занимают budget байт: всё нарисованное помещается в кэш и не вытесняется им же.
+
+    Args:
+        groups (list): Какие страницы прогревать.
+        window (int): Сколько задач держать в очереди пула (по умолчанию 2 × число процессов).
+        budget (int): Сколько байт кэша может занять прогрев (по умолчанию доля PREWARM_SHARE
+                      от render_cache.MAX_CACHE_BYTES).
+        log (callable): Куда писать прогресс.
+
+    Returns:
+        dict: {'total': задач, 'rendered': нарисовано, 'cached': уже было в кэше,
+               'errors': с ошибкой, 'skipped': не поместилось в budget, 'bytes': размер картинок,
+               'seconds': общее время}.
+    """
+    jobs = list(combinations(groups))
+    window = window or 2 * render_service.MAX_WORKERS
+    budget = budget or int(render_cache.MAX_CACHE_BYTES * PREWARM_SHARE)
+    if budget > render_cache.MAX_CACHE_BYTES:
+        raise ValueError(f'прогрев ({budget} байт) не помещается в кэш ({render_cache.MAX_CACHE_BYTES} байт)')
+    stats = {'total': len(jobs), 'rendered': 0, 'cached': 0, 'errors': 0, 'skipped': 0, 'bytes': 0}
+    start = time.perf_counter()
+    log(f'прогрев {", ".join(groups)}: {len(jobs)} картинок, процессов: {render_service.MAX_WORKERS}')
+
+    progress = {'done': 0, 'next': PROGRESS_STEP}
+
+    def count(result):
+        stats[result] += 1
+        progress['done'] += 1
+        if progress['done'] / len(jobs) >= progress['next']:
+            log(f'  {progress["done"]}/{len(jobs)} ({progress["done"] / len(jobs):.0%}), '
+                f'{time.perf_counter() - start:.0f} с')
+            progress['next'] = (int(progress['done'] / len(jobs) / PROGRESS_STEP) + 1) * PROGRESS_STEP
+
+    pending = collections.deque()
+
+    def finish_one():
+        key = pending.popleft()
+        state = render_service.wait(key, timeout=None)
+        stats['bytes'] += _size(key)
+        count('rendered' if state == 'done' else 'errors')
+
+    for i, (name, filters) in enumerate(jobs):
+        if stats['bytes'] >= budget:
+            stats['skipped'] = len(jobs) - i
+            log(f'прогрев занял {stats["bytes"] / 2 ** 20:.0f} МБ из {budget / 2 ** 20:.0f} МБ, '
+                f'остальные {stats["skipped"]} картинок рисуются по запросу')
+            break
+        key = render_service.job_id(name, filters)
+        if render_cache.contains(key):
+            stats['bytes'] += _size(key)
+            count('cached')
+            continue
+        pending.append(render_service.submit(name, filters, prewarm=True))
+        if len(pending) >= window:
+            finish_one()
+    while pending:
+        finish_one()
+
+    stats['seconds'] = time.perf_counter() - start
+    log(f'прогрев завершён за {stats["seconds"]:.1f} с: нарисовано {stats["rendered"]}, '
+        f'уже в кэше {stats["cached"]}, ошибок {stats["errors"]}, не поместилось {stats["skipped"]}')
+    return stats
+
+
+def _size(key):
+    try:
+        return os.path.getsize(render_cache.cache_path(key))
+    except OSError:
+        return 0
+
+
+def sources_stamp():
+    """Отпечаток всех исходных CSV, от которых зависят картинки."""
+    sources = set()
+    for module, _, attr in render_service.RENDERERS.values():
+        sources.update(getattr(importlib.import_module(module), attr))
+    return tuple(render_cache.file_stamp(path) for path in sorted(sources))
+
+
+def start_background(groups=GROUPS, interval=WATCH_INTERVAL):
+    """
+    Запускает фоновый прогрев: сразу после старта и каждый раз, когда меняются исходные CSV.
+
+    Returns:
+        threading.Thread: Поток-демон с прогревом.
+    """
+    def watch():
+        last = None
+        while True:
+            stamp = sources_stamp()
+            if stamp != last:
+                try:
+                    run(groups)
+                    last = stamp
+                except Exception as e:
+                    # Прогрев — оптимизация: ошибка не должна ронять приложение, попробуем в следующий раз
+                    _log(f'прогрев не удался: {e!r}')
+            time.sleep(interval)
+
+    thread = threading.Thread(target=watch, name='prewarm', daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == '__main__':
+    # python prewarm.py [teams] [players] [shots] — по умолчанию все страницы
+    run(sys.argv[1:] or GROUPS)
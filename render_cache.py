@@ -0,0 +1,265 @@
+import hashlib
+import io
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+# Дисковый кэш готовых картинок для /shots, /teams и /players.
+# Ключ — хэш от (имя функции, нормализованные фильтры, отпечатки исходных CSV),
+# поэтому при изменении любого исходного файла старые картинки просто перестают находиться.
+CACHE_DIR = os.path.join('static', 'images', 'cache')
+MAX_CACHE_BYTES = 200 * 1024 * 1024  # ограничение размера кэша на диске (LRU)
+# Последние картинки держим и в памяти: маршрут картинки отдаёт байты без чтения с диска
+MAX_MEMORY_BYTES = 64 * 1024 * 1024
+
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'prewarm_misses': 0, 'evictions': 0}
+_file_hashes = {}  # path -> ((mtime_ns, size), sha1)
+_memory = OrderedDict()  # key -> bytes, от давно использованных к недавним
+_memory_bytes = 0
+
+
+def file_stamp(path):
+    """
+    Отпечаток исходного файла: хэш содержимого.
+    Содержимое перечитывается только при изменении mtime/размера файла.
+
+    Args:
+        path (str): Путь к файлу.
+
+    Returns:
+        str: sha1 содержимого или 'missing', если файла нет.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return 'missing'
+    meta = (st.st_mtime_ns, st.st_size)
+    cached = _file_hashes.get(path)
+    if cached is not None and cached[0] == meta:
+        return cached[1]
+
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    digest = h.hexdigest()
+    _file_hashes[path] = (meta, digest)
+    return digest
+
+
+def normalize_filters(filters):
+    """Приводит фильтры к каноническому виду: None/'None'/'' -> 'All', строки без пробелов по краям."""
+    normalized = {}
+    for name, value in filters.items():
+        if isinstance(value, (list, tuple)):
+            value = [str(v).strip() for v in value]
+        elif value is None or str(value).strip() in ('', 'None'):
+            value = 'All'
+        else:
+            value = str(value).strip()
+        normalized[name] = value
+    return normalized
+
+
+def make_key(name, filters, sources, ext='png'):
+    """
+    Строит ключ кэша.
+
+    Args:
+        name (str): Имя функции отрисовки (например, 'best_teams').
+        filters (dict): Фильтры запроса.
+        sources (list | dict): Пути к исходным CSV, от которых зависит картинка,
+            или уже посчитанные отпечатки {путь: file_stamp} (см. data_sources.Snapshot.stamps).
+        ext (str): Формат картинки, он же расширение файла.
+
+    Returns:
+        str: Шестнадцатеричный sha1-ключ с расширением, например '3f...a1.png'.
+    """
+    stamps = sources if isinstance(sources, dict) else {p: file_stamp(p) for p in sources}
+    payload = {
+        'name': name,
+        'filters': normalize_filters(filters),
+        'sources': {os.path.basename(p): stamps[p] for p in sorted(stamps)},
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return f"{hashlib.sha1(raw.encode('utf-8')).hexdigest()}.{ext}"
+
+
+def cache_path(key):
+    return os.path.join(CACHE_DIR, key)
+
+
+def _is_image(name):
+    return not name.endswith('.tmp')
+
+
+def remember(key, data):
+    """Кладёт готовую картинку в кэш в памяти, вытесняя самые давние картинки сверх MAX_MEMORY_BYTES."""
+    global _memory_bytes
+    with _lock:
+        if key in _memory:
+            _memory.move_to_end(key)
+            return
+        _memory[key] = data
+        _memory_bytes += len(data)
+        while _memory_bytes > MAX_MEMORY_BYTES and len(_memory) > 1:
+            _, old = _memory.popitem(last=False)
+            _memory_bytes -= len(old)
+
+
+def contains(key):
+    """Есть ли готовая картинка в памяти или на диске."""
+    with _lock:
+        if key in _memory:
+            return True
+    return os.path.exists(cache_path(key))
+
+
+def touch(key):
+    """Отмечает использование картинки: _evict вытесняет файлы с самым старым mtime."""
+    try:
+        os.utime(cache_path(key))
+    except OSError:
+        pass
+
+
+def count(hit, prewarm=False):
+    """
+    Учитывает обращение к кэшу в счётчиках /cache_stats.
+    Задачи прогрева (prewarm=True) в hit_rate не входят: их промахи считаются отдельно
+    в prewarm_misses, а попадания не считаются вовсе.
+    """
+    if prewarm and hit:
+        return
+    with _lock:
+        _stats['prewarm_misses' if prewarm else 'hits' if hit else 'misses'] += 1
+
+
+def get_bytes(key):
+    """
+    Байты готовой картинки: из памяти, а если её там нет — с диска.
+
+    Args:
+        key (str): Ключ картинки.
+
+    Returns:
+        bytes | None: Байты картинки или None, если картинки нет.
+    """
+    # Картинку, которую отдают из памяти, тоже отмечаем на диске, иначе она вытеснится как давняя
+    touch(key)
+    with _lock:
+        data = _memory.get(key)
+        if data is not None:
+            _memory.move_to_end(key)
+            return data
+    try:
+        with open(cache_path(key), 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    remember(key, data)
+    return data
+
+
+def get_or_render(name, filters, sources, render, ext='png'):
+    """
+    Возвращает ключ готовой картинки, при промахе отрисовывает её.
+
+    Args:
+        name (str): Имя функции отрисовки.
+        filters (dict): Фильтры запроса.
+        sources (list | dict): Пути к исходным CSV или их отпечатки (см. make_key).
+        render (callable): render(output) — сохраняет картинку в переданный файл-объект.
+        ext (str): Формат картинки (см. make_key).
+
+    Returns:
+        str: Ключ картинки; байты отдаёт get_bytes(key).
+    """
+    key = make_key(name, filters, sources, ext)
+    path = cache_path(key)
+
+    with _lock:
+        in_memory = key in _memory
+    if in_memory or os.path.exists(path):
+        touch(key)
+        with _lock:
+            _stats['hits'] += 1
+        return key
+
+    with _lock:
+        _stats['misses'] += 1
+
+    buffer = io.BytesIO()
+    render(buffer)
+    data = buffer.getvalue()
+    remember(key, data)
+
+    # Диск нужен, чтобы картинки переживали перезапуск и были видны всем процессам пула.
+    # Пишем во временный файл и атомарно переименовываем, чтобы никто не прочитал недописанный PNG
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    _evict()
+    return key
+
+
+def _evict():
+    """Удаляет самые давно использованные картинки, пока кэш больше MAX_CACHE_BYTES."""
+    try:
+        entries = [e for e in os.scandir(CACHE_DIR) if e.is_file() and _is_image(e.name)]
+    except OSError:
+        return
+    files = []
+    for e in entries:
+        try:
+            st = e.stat()
+        except OSError:
+            continue
+        files.append((st.st_mtime, st.st_size, e.path))
+    total = sum(size for _, size, _ in files)
+    if total <= MAX_CACHE_BYTES:
+        return
+
+    files.sort()
+    for _, size, path in files:
+        if total <= MAX_CACHE_BYTES:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        with _lock:
+            _stats['evictions'] += 1
+
+
+def get_stats():
+    """Счётчики попаданий/промахов кэша и его текущий размер."""
+    with _lock:
+        stats = dict(_stats)
+    requests_total = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / requests_total if requests_total else 0.0
+
+    entries = 0
+    size = 0
+    if os.path.isdir(CACHE_DIR):
+        for e in os.scandir(CACHE_DIR):
+            if _is_image(e.name):
+                entries += 1
+                size += e.stat().st_size
+    stats['entries'] = entries
+    stats['bytes'] = size
+    with _lock:
+        stats['memory_entries'] = len(_memory)
+        stats['memory_bytes'] = _memory_bytes
+    return stats
@@ -0,0 +1,62 @@
+# Параметры вывода картинок, общие для best_teams, best_players и shots_map:
+# пресеты разрешения и форматы файла. Выбираются параметрами запроса ?quality=...&output=...
+# (не format: так называется фильтр карты бросков EV/PP/PK)
+DPI_PRESETS = {
+    'thumbnail': 72,
+    'screen': 100,  # dpi фигуры matplotlib по умолчанию, в нём всегда рисовались карты бросков
+    'print': 300,   # в нём всегда рисовались таблицы
+}
+
+# формат -> (mime-тип, дополнительные аргументы savefig)
+# PNG оставлен со сжатием по умолчанию: optimize=True на таблице команд даёт ~2% размера
+# при +70% времени сохранения (см. benchmarks/bench_options.py). Для мобильных клиентов
+# выгоднее WebP: при том же dpi он в 2–4 раза меньше PNG при сопоставимом времени.
+FORMATS = {
+    'png': ('image/png', {}),
+    'webp': ('image/webp', {'pil_kwargs': {'quality': 90}}),
+    'svg': ('image/svg+xml', {}),
+}
+DEFAULT_FORMAT = 'png'
+
+
+def parse(values):
+    """
+    Достаёт параметры вывода из запроса.
+
+    Args:
+        values (Mapping): request.values (query-строка и поля формы).
+
+    Returns:
+        dict: Только заданные и известные параметры: 'quality' (пресет из DPI_PRESETS)
+              и/или 'fmt' (формат из FORMATS). Остальные берутся по умолчанию модуля отрисовки.
+    """
+    options = {}
+    quality = values.get('quality')
+    fmt = str(values.get('output') or '').lower()
+    if quality in DPI_PRESETS:
+        options['quality'] = quality
+    if fmt in FORMATS:
+        options['fmt'] = fmt
+    return options
+
+
+def dpi(quality):
+    return DPI_PRESETS[quality]
+
+
+def mimetype(fmt):
+    return FORMATS[fmt][0]
+
+
+def save(fig, output, quality, fmt, **kwargs):
+    """
+    Сохраняет фигуру с выбранным разрешением и форматом.
+
+    Args:
+        fig (Figure): Фигура matplotlib.
+        output (str | file): Путь или файловый объект.
+        quality (str): Пресет из DPI_PRESETS.
+        fmt (str): Формат из FORMATS.
+        **kwargs: Остальные аргументы savefig (bbox_inches и т.п.).
+    """
+    fig.savefig(output, dpi=DPI_PRESETS[quality], format=fmt, **FORMATS[fmt][1], **kwargs)
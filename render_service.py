@@ -0,0 +1,204 @@
+import importlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import render_cache
+import render_options
+
+# Фоновая отрисовка тяжёлых картинок в пуле процессов.
+# HTTP-обработчик только ставит задачу и сразу отвечает id задачи (это ключ кэша картинки),
+# а сама картинка отдаётся отдельным запросом, когда готова. Одинаковые задачи, которые
+# уже рисуются, не дублируются: повторный запрос получает тот же id.
+
+# имя задачи -> (модуль, функция generate, имя списка исходных файлов)
+RENDERERS = {
+    'best_teams': ('best_teams', 'generate', 'SOURCES'),
+    'best_players': ('best_players', 'generate', 'SOURCES'),
+    'generate_heat_map': ('shots_map', 'generate_heat_map', 'SOURCES'),
+    'generate_heat_map_points': ('shots_map', 'generate_heat_map_points', 'SOURCES'),
+    'generate_zone_map': ('shots_map', 'generate_zone_map', 'SOURCES'),
+}
+MAX_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+RESULT_TIMEOUT = 60  # сколько секунд запрос картинки ждёт окончания отрисовки
+
+_lock = threading.Lock()
+_executor = None
+_jobs = {}    # id -> Future, пока задача выполняется
+_errors = {}  # id -> текст ошибки последней неудачной попытки
+_ready = threading.Event()
+
+
+def _init_worker(cache_dir):
+    # Датасеты, модули, логотипы и фото загружаются один раз при старте процесса пула.
+    # Каталог кэша берётся у веб-процесса: forkserver не копирует его состояние, и подмена
+    # render_cache.CACHE_DIR (например, в бенчмарке) иначе до воркеров не дошла бы
+    import assets
+
+    render_cache.CACHE_DIR = cache_dir
+
+    for name in {module for module, _, _ in RENDERERS.values()}:
+        module = importlib.import_module(name)
+        if hasattr(module, 'warm'):
+            module.warm()
+    assets.warm()
+
+
+def _ping():
+    return os.getpid()
+
+
+def start():
+    """
+    Готовит отрисовку заранее: импортирует модули отрисовки (нужны для id задач)
+    и поднимает процессы пула. Вызывается в фоновом потоке при старте приложения,
+    после завершения ready() возвращает True. Ошибка загрузки пробрасывается вызывающему.
+    """
+    for module, _, _ in set(RENDERERS.values()):
+        importlib.import_module(module)
+    executor = _get_executor()
+    # initializer процесса отрабатывает до его первой задачи, так что пустые задачи ждут готовности пула
+    try:
+        for future in [executor.submit(_ping) for _ in range(MAX_WORKERS)]:
+            future.result()
+    except BrokenProcessPool:
+        # Процесс пула упал при загрузке данных: сломанный пул не переиспользуем, повторный start() создаст новый
+        _discard_executor(executor)
+        raise
+    _ready.set()
+
+
+def ready():
+    return _ready.is_set()
+
+
+def _run(name, filters):
+    module, func, _ = RENDERERS[name]
+    key = getattr(importlib.import_module(module), func)(**filters)
+    # Байты возвращаем основному процессу, чтобы он отдавал картинку из памяти
+    return key, render_cache.get_bytes(key)
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            # Процессы пула запускает отдельный однопоточный forkserver, а не fork веб-процесса:
+            # копия веб-процесса унаследовала бы блокировки (импорта и любые другие), которые
+            # в момент fork держали потоки запросов или прогрева, и могла бы зависнуть на них
+            _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS, initializer=_init_worker,
+                                            initargs=(render_cache.CACHE_DIR,), mp_context=multiprocessing.get_context('forkserver'))
+        return _executor
+
+
+def _discard_executor(executor):
+    global _executor
+    with _lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def job_id(name, filters):
+    """Id задачи — ключ картинки в render_cache, так что готовые задачи сразу берутся из кэша."""
+    module, _, sources = RENDERERS[name]
+    module = importlib.import_module(module)
+    filters = _with_options(module, filters)
+    return render_cache.make_key(name, filters, getattr(module, sources), ext=filters['fmt'])
+
+
+def _with_options(module, filters):
+    # generate всегда кладёт quality и fmt в ключ, поэтому и id задачи строим с ними
+    options = {'quality': module.DEFAULT_QUALITY, 'fmt': render_options.DEFAULT_FORMAT}
+    options.update(filters)
+    return options
+
+
+def submit(name, filters, prewarm=False):
+    """
+    Ставит отрисовку в очередь и сразу возвращает id задачи.
+
+    Args:
+        name (str): Имя задачи из RENDERERS.
+        filters (dict): Аргументы функции generate.
+        prewarm (bool): Задача прогрева (prewarm.py): не входит в hit_rate /cache_stats.
+
+    Returns:
+        str: Id задачи (совпадает с ключом картинки в кэше).
+    """
+    key = job_id(name, filters)
+    # Попадания и промахи считаются здесь, в веб-процессе: счётчики процессов пула до /cache_stats не доходят
+    if render_cache.contains(key):
+        render_cache.touch(key)
+        render_cache.count(hit=True, prewarm=prewarm)
+        return key
+
+    executor = _get_executor()
+    with _lock:
+        # Такая же задача уже рисуется — подключаемся к ней, повторной отрисовки нет
+        if key in _jobs:
+            render_cache.count(hit=True, prewarm=prewarm)
+            return key
+        render_cache.count(hit=False, prewarm=prewarm)
+        _errors.pop(key, None)
+        future = executor.submit(_run, name, dict(filters))
+        _jobs[key] = future
+    future.add_done_callback(lambda f, key=key: _finish(key, f))
+    return key
+
+
+def _finish(key, future):
+    with _lock:
+        _jobs.pop(key, None)
+        if future.exception() is not None:
+            _errors[key] = repr(future.exception())
+            return
+    _, data = future.result()
+    if data is not None:
+        render_cache.remember(key, data)
+
+
+def status(key):
+    """Состояние задачи: 'done', 'pending', 'error' или 'unknown'."""
+    if render_cache.contains(key):
+        return 'done'
+    with _lock:
+        if key in _jobs:
+            return 'pending'
+        if key in _errors:
+            return 'error'
+    return 'unknown'
+
+
+def error(key):
+    with _lock:
+        return _errors.get(key)
+
+
+def wait(key, timeout=RESULT_TIMEOUT):
+    """
+    Ждёт окончания задачи.
+
+    Returns:
+        str: Итоговое состояние (см. status).
+    """
+    with _lock:
+        future = _jobs.get(key)
+    if future is None:
+        return status(key)
+    # Итог берём из самой задачи: result() возвращается раньше, чем отработает _finish,
+    # и status() в этот момент ещё видел бы задачу в _jobs
+    try:
+        _, data = future.result(timeout=timeout)
+    except TimeoutError:
+        return 'pending'
+    except Exception as e:
+        with _lock:
+            _errors.setdefault(key, repr(e))
+        return 'error'
+    if data is None:
+        return status(key)
+    render_cache.remember(key, data)
+    return 'done'
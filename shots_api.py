@@ -0,0 +1,142 @@
+import collections
+import gzip
+import hashlib
+import json
+import threading
+
+import numpy as np
+
+import shots_data
+
+# Данные карты бросков для отрисовки в браузере.
+# Вместо готовой картинки клиент получает сами броски под фильтры страницы /shots
+# (координаты площадки, xG, гол, игрок, игра) и рисует и перефильтровывает их у себя.
+# Основной формат — упакованные столбцы little-endian:
+#   uint32 длина заголовка | JSON-заголовок | выравнивание до 4 байт | столбцы COLUMNS подряд.
+# Игроки и игры передаются кодами, их словари — в заголовке (только значения этой страницы).
+# Запасной формат — тот же набор столбцов в JSON. Ответ сжимается gzip и делится на страницы:
+# выборка 'All' — десятки тысяч бросков, её можно получать частями.
+ENCODINGS = {'f32': 'application/octet-stream', 'json': 'application/json'}
+DEFAULT_ENCODING = 'f32'
+DEFAULT_LIMIT = 5000
+MAX_LIMIT = 50000
+FILTERS = ['season', 'stage', 'pos', 'format', 'map_type', 'team', 'player']
+MULTI_FILTERS = ['season', 'format', 'team']  # эти фильтры принимают несколько значений через запятую
+# Коды игроков и игр помещаются в uint16: на странице не больше MAX_LIMIT < 65536 разных значений.
+# Столбцы идут от широких к узким, чтобы каждый начинался с выровненного адреса
+COLUMNS = [('x', '<f4'), ('y', '<f4'), ('pred_proba', '<f4'), ('player', '<u2'), ('game', '<u2'), ('goal', 'u1')]
+# Точность чисел: сантиметры и 1e-4 xG. Лишние знаки float32 — шум, который плохо сжимается gzip
+DIGITS = {'x': 2, 'y': 2, 'pred_proba': 4}
+MAX_PAGES = 64  # сколько готовых страниц держать в памяти
+
+_lock = threading.Lock()
+_pages = collections.OrderedDict()  # (версия данных, запрос) -> (gzip-тело, etag, заголовок)
+
+
+def parse(values):
+    """
+    Разбирает параметры запроса данных.
+
+    Args:
+        values (Mapping): request.args: фильтры как у /shots (season, format и team — можно
+                          несколько через запятую), offset, limit, encoding.
+
+    Returns:
+        tuple: (фильтры, offset, limit, encoding).
+
+    Raises:
+        ValueError: Неизвестное значение фильтра или параметра страницы.
+    """
+    filters = {name: values.get(name) or 'All' for name in FILTERS}
+    if filters['map_type'] == 'All':
+        filters['map_type'] = 'Броски'
+    for name in MULTI_FILTERS:
+        if ',' in filters[name]:
+            # Кортеж, а не список: фильтры входят в ключ кэша страниц
+            filters[name] = tuple(v.strip() for v in filters[name].split(',') if v.strip()) or 'All'
+    if ',' in filters['player']:
+        raise ValueError('player: можно указать только одного игрока')
+    if filters['pos'] not in shots_data.poses:
+        raise ValueError(f'неизвестная позиция: {filters["pos"]}')
+    if filters['map_type'] not in shots_data.map_types:
+        raise ValueError(f'неизвестный тип карты: {filters["map_type"]}')
+    encoding = values.get('encoding') or DEFAULT_ENCODING
+    if encoding not in ENCODINGS:
+        raise ValueError(f'неизвестный формат: {encoding}, доступны {", ".join(ENCODINGS)}')
+    try:
+        offset = int(values.get('offset') or 0)
+        limit = int(values.get('limit') or DEFAULT_LIMIT)
+    except ValueError:
+        raise ValueError('offset и limit должны быть целыми числами')
+    if offset < 0 or not 0 < limit <= MAX_LIMIT:
+        raise ValueError(f'нужно offset >= 0 и 0 < limit <= {MAX_LIMIT}')
+    return filters, offset, limit, encoding
+
+
+def page(filters, offset=0, limit=DEFAULT_LIMIT, encoding=DEFAULT_ENCODING):
+    """
+    Страница отфильтрованных бросков.
+
+    Args:
+        filters (dict): Фильтры из parse().
+        offset (int): Номер первого броска страницы в выборке.
+        limit (int): Сколько бросков на странице.
+        encoding (str): Формат из ENCODINGS.
+
+    Returns:
+        tuple: (тело, сжатое gzip; etag; заголовок: version, total, offset, count, next).
+    """
+    snapshot = shots_data.source()
+    key = (snapshot.version, tuple(sorted(filters.items())), offset, limit, encoding)
+    with _lock:
+        if key in _pages:
+            _pages.move_to_end(key)
+            return _pages[key]
+
+    header, columns = _select(snapshot, filters, offset, limit)
+    body = _pack(header, columns) if encoding == 'f32' else _json(header, columns)
+    # mtime=0: одинаковые данные дают одинаковые байты, ETag не зависит от времени сжатия
+    result = (gzip.compress(body, compresslevel=6, mtime=0), hashlib.sha1(body).hexdigest(), header)
+    with _lock:
+        _pages[key] = result
+        while len(_pages) > MAX_PAGES:
+            _pages.popitem(last=False)
+    return result
+
+
+def _select(snapshot, filters, offset, limit):
+    data = snapshot.data
+    df = data['df']
+    f = filters
+    selected = shots_data.select_shots(f['season'], f['pos'], f['format'], f['map_type'], f['team'], f['player'],
+                                      df=df, index=data['index'], players=data['players'])
+    total = len(selected)
+    part = selected.iloc[offset:offset + limit]
+    columns = {'x': part['x_rink'].to_numpy(), 'y': part['y_rink'].to_numpy(), 'pred_proba': part['pred_proba'].to_numpy(), 'goal': part['goal'].to_numpy()}
+    for name, digits in DIGITS.items():
+        columns[name] = np.round(np.asarray(columns[name], dtype=np.float64), digits)
+    header = {'version': snapshot.version, 'total': total, 'offset': offset, 'count': len(part),
+              'next': offset + len(part) if offset + len(part) < total else None}
+    for column, name in [('player_name', 'player'), ('game', 'game')]:
+        # Перекодируем в словарь только тех значений, что есть на странице
+        used, codes = np.unique(part[column].cat.codes.to_numpy(), return_inverse=True)
+        columns[name] = codes
+        header[f'{name}s'] = [str(v) for v in df[column].cat.categories[used]]
+    return header, columns
+
+
+def _pack(header, columns):
+    header = dict(header, columns=[[name, dtype] for name, dtype in COLUMNS])
+    raw = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    padding = b' ' * (-(4 + len(raw)) % 4)  # столбцы float32 начинаются с адреса, кратного 4
+    parts = [np.uint32(len(raw) + len(padding)).astype('<u4').tobytes(), raw, padding]
+    parts += [np.ascontiguousarray(columns[name], dtype=dtype).tobytes() for name, dtype in COLUMNS]
+    return b''.join(parts)
+
+
+def _json(header, columns):
+    payload = dict(header)
+    for name, _ in COLUMNS:
+        values = np.asarray(columns[name])
+        payload[name] = values.astype(int).tolist() if name == 'goal' else values.tolist()
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
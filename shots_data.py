@@ -0,0 +1,86 @@
+import data_sources
+import player_search
+import shots_index
+import shots_stats
+import shots_store
+
+# Снимок датасета бросков без картинок: сами броски, индекс фильтров, индекс игроков и куб статистики.
+# Его читают и API (/api/shots, /api/players, /api/stats) в веб-процессе, и отрисовка в пуле.
+# Куб сеток плотности (~40 МБ, пересборка — секунды) нужен только тепловой карте и загружается
+# отдельным снимком в shots_map, поэтому веб-процесс его не держит и запросы API его не ждут.
+
+# исходные файлы, от которых зависят данные (для кэша)
+SOURCES = shots_store.SOURCES
+
+poses = {'нападающие': 'н', 'защитники': 'з', 'All': 'All'}
+map_types = {'Броски': 'shots', 'Голы': 'goals', 'xG': 'xg', 'All': 'All'}
+
+
+def _load(previous):
+    # Загрузчик снимка для data_sources. previous — прежний снимок: если CSV сезонов те же,
+    # значит, в хранилище только дописали игры в конец (shots_ingest.py) и индекс можно дописать
+    df = shots_store.load()
+    base = shots_store.sources_stamp()
+    if previous is not None and previous.data['base'] == base and len(df) > previous.data['index']['rows']:
+        start = previous.data['index']['rows']
+        index = shots_index.extend(previous.data['index'], df, start)
+        stats = shots_stats.update(previous.data['stats'], df, start)
+    else:
+        index = shots_index.build(df)
+        stats = shots_stats.build(df)
+    return {'base': base, 'df': df, 'index': index, 'players': player_search.build(df), 'stats': stats}
+
+
+data_sources.register('shots', SOURCES, _load)
+
+
+def source():
+    """
+    Текущий снимок датасета бросков (см. data_sources). Загружается при первом обращении,
+    а не при импорте: веб-процессу, которому нужны только константы модуля, он не нужен.
+    После обновления CSV или догрузки новых игр (см. shots_ingest.py) процесс подхватывает
+    новую версию без перезапуска.
+    """
+    return data_sources.get('shots')
+
+
+def select_shots(season, pos, format, map_type, team, player, df=None, index=None, players=None):
+    """
+    Отбирает броски под фильтры страницы /shots через индекс shots_index.
+
+    Args:
+        season (str | list): Сезон или список сезонов, 'All' — все.
+        pos (str): Позиция из POS_VAR ('нападающие', 'защитники', 'All').
+        format (str | list): 'EV', 'PP', 'PK' (или их список) или 'All'.
+        map_type (str): 'Броски', 'Голы' или 'xG' — для 'Голы' остаются только голы.
+        team (str | list): Команда (или список команд) или 'All'.
+        player (str): Имя игрока (регистр и ё/е не важны, можно только начало, если оно
+                      однозначно, см. player_search.resolve); None/'None'/'' — все игроки.
+        df, index, players: Датасет, его индекс и индекс игроков; по умолчанию — из source().
+
+    Returns:
+        pd.DataFrame: Только подходящие строки датасета.
+    """
+    if df is None:
+        data = source().data
+        df, index, players = data['df'], data['index'], data['players']
+    if player is None or player in ('None', ''):
+        player = 'All'
+    elif player != 'All':
+        players = source().data['players'] if players is None else players
+        # Неизвестный игрок даёт пустую выборку, как и раньше при несовпадении строки
+        player = player_search.resolve(players, player) or player
+    rows = shots_index.select(
+        index,
+        team=team,
+        season=season,
+        pos=poses[pos],
+        player_name=player,
+        format=format,
+        # 0.6 Этап плей-офф/регулярный сезон пока не фильтруется
+        goal=True if map_types[map_type] == 'goals' else None,
+    )
+    if len(rows) == len(df):
+        return df
+    return df.iloc[rows]
+
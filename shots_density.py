@@ -0,0 +1,336 @@
+import itertools
+import json
+import os
+
+import numpy as np
+
+import render_cache
+import shots_index
+import shots_store
+
+# Плотность бросков для тепловых карт.
+# Броски раскладываются по фиксированной сетке площадки (правая половина IIHF, метры),
+# гистограмма сглаживается гауссовым ядром через FFT. Для типового куба фильтров
+# (команда × сезон × позиция × формат × броски/голы/xG) сетки считаются заранее и хранятся
+# на диске в float16, так что тепловая карта рисуется из готовой сетки.
+# Плотность xG — это та же оценка, где каждый бросок взвешен своим pred_proba.
+X_RANGE = (0.0, 30.0)
+Y_RANGE = (-16.0, 16.0)
+NX, NY = 75, 80  # шаг 0.4 м
+X_EDGES = np.linspace(*X_RANGE, NX + 1)
+Y_EDGES = np.linspace(*Y_RANGE, NY + 1)
+X_CENTERS = (X_EDGES[:-1] + X_EDGES[1:]) / 2
+Y_CENTERS = (Y_EDGES[:-1] + Y_EDGES[1:]) / 2
+CELL_X = X_EDGES[1] - X_EDGES[0]
+CELL_Y = Y_EDGES[1] - Y_EDGES[0]
+
+GRIDS_PATH = os.path.join('static', 'csv', 'density_grids.npz')
+# Измерения куба: значения 'All' добавляются как сумма по измерению
+CUBE_DIMS = ['team', 'season', 'pos', 'format']
+KINDS = ['shots', 'goals', 'xg']
+# Версия формата куба: при изменении куб пересчитывается даже при тех же CSV
+GRIDS_VERSION = 3
+MIN_SHOTS = 2  # меньше двух бросков — плотность не оценивается
+
+
+def bin_index(x, y):
+    """
+    Номер ячейки сетки для каждой точки (плоский индекс iy * NX + ix), -1 — вне площадки.
+
+    Args:
+        x (np.ndarray): Координаты по длине площадки, м.
+        y (np.ndarray): Координаты по ширине площадки, м.
+    """
+    ix = np.floor((np.asarray(x, dtype=np.float64) - X_RANGE[0]) / CELL_X).astype(np.int64)
+    iy = np.floor((np.asarray(y, dtype=np.float64) - Y_RANGE[0]) / CELL_Y).astype(np.int64)
+    inside = (ix >= 0) & (ix < NX) & (iy >= 0) & (iy < NY)
+    return np.where(inside, iy * NX + ix, -1)
+
+
+def scott_bandwidth(n, std_x, std_y):
+    """Ширина ядра по правилу Скотта (как у scipy.stats.gaussian_kde и seaborn по умолчанию)."""
+    factor = n ** (-1 / 6) if n > 0 else 1.0
+    return max(std_x * factor, CELL_X / 2), max(std_y * factor, CELL_Y / 2)
+
+
+def smooth(hist, bw_x, bw_y):
+    """
+    Свёртка гистограммы с гауссовым ядром через FFT.
+
+    Args:
+        hist (np.ndarray): Гистограмма формы (NY, NX).
+        bw_x (float): Стандартное отклонение ядра по x, м.
+        bw_y (float): Стандартное отклонение ядра по y, м.
+
+    Returns:
+        np.ndarray: Плотность формы (NY, NX), нормированная на единичную массу.
+    """
+    kx = int(np.ceil(4 * bw_x / CELL_X))
+    ky = int(np.ceil(4 * bw_y / CELL_Y))
+    gx = np.exp(-0.5 * (np.arange(-kx, kx + 1) * CELL_X / bw_x) ** 2)
+    gy = np.exp(-0.5 * (np.arange(-ky, ky + 1) * CELL_Y / bw_y) ** 2)
+    kernel = np.outer(gy, gx)
+
+    # Дополняем нулями, чтобы свёртка была линейной, а не циклической
+    shape = (hist.shape[0] + 2 * ky, hist.shape[1] + 2 * kx)
+    conv = np.fft.irfft2(np.fft.rfft2(hist, shape) * np.fft.rfft2(kernel, shape), shape)
+    density = conv[ky:ky + hist.shape[0], kx:kx + hist.shape[1]]
+    density = np.clip(density, 0, None)
+    total = density.sum()
+    return density / total if total > 0 else density
+
+
+def _moments(x, y, w):
+    # Σw, Σw², Σwx, Σwx², Σwy, Σwy² — по ним считаются взвешенные std и эффективное n
+    return np.array([w.sum(), (w * w).sum(), (w * x).sum(), (w * x * x).sum(), (w * y).sum(), (w * y * y).sum()])
+
+
+def _bandwidth_from_moments(moments):
+    sw, sw2, swx, swxx, swy, swyy = moments
+    if sw <= 0:
+        return None
+    # Эффективный размер выборки для весов (Kish), как в gaussian_kde с weights
+    n_eff = sw * sw / sw2
+    std_x = np.sqrt(max(swxx / sw - (swx / sw) ** 2, 0))
+    std_y = np.sqrt(max(swyy / sw - (swy / sw) ** 2, 0))
+    return scott_bandwidth(n_eff, std_x, std_y)
+
+
+def binned_kde(x, y, weights=None):
+    """
+    Быстрая оценка плотности бросков на сетке площадки.
+
+    Args:
+        x (np.ndarray): Координаты по длине площадки, м.
+        y (np.ndarray): Координаты по ширине площадки, м.
+        weights (np.ndarray | None): Веса бросков (например, pred_proba для карты xG).
+
+    Returns:
+        np.ndarray | None: Плотность формы (NY, NX) или None, если бросков слишком мало.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) < MIN_SHOTS:
+        return None
+    w = np.ones_like(x) if weights is None else np.asarray(weights, dtype=np.float64)
+    bandwidth = _bandwidth_from_moments(_moments(x, y, w))
+    if bandwidth is None:
+        return None
+    bins = bin_index(x, y)
+    inside = bins >= 0
+    hist = np.bincount(bins[inside], weights=w[inside], minlength=NX * NY).reshape(NY, NX)
+    return smooth(hist, *bandwidth)
+
+
+def contour_levels(density, thresh=0.08, levels=10):
+    """
+    Уровни изолиний как в seaborn.kdeplot: thresh и levels задаются долями массы,
+    которые переводятся в значения плотности.
+
+    Args:
+        density (np.ndarray): Плотность на сетке.
+        thresh (float): Доля массы ниже самого нижнего уровня (шум отбрасывается).
+        levels (int): Количество уровней.
+
+    Returns:
+        np.ndarray: Возрастающие значения плотности для contourf.
+    """
+    isoprop = np.linspace(thresh, 1, levels)
+    values = np.sort(np.ravel(density))[::-1]
+    cumulative = np.cumsum(values) / values.sum()
+    idx = np.searchsorted(cumulative, 1 - isoprop)
+    return np.unique(np.take(values, idx, mode='clip'))
+
+
+def draw(ax, density, thresh=0.08, levels=10, **contour_kws):
+    """Рисует залитые изолинии плотности на оси площадки."""
+    draw_levels = contour_levels(density, thresh, levels)
+    if len(draw_levels) < 2:
+        return None
+    return ax.contourf(X_CENTERS, Y_CENTERS, density, levels=draw_levels, **contour_kws)
+
+
+def _with_totals(arr, axis):
+    # Добавляет в конец измерения значение 'All' — сумму по измерению
+    return np.concatenate([arr, arr.sum(axis=axis, keepdims=True)], axis=axis)
+
+
+def build_grids(df, x, y):
+    """
+    Считает сетки плотности для всего куба фильтров, включая значения 'All'.
+
+    Все броски один раз раскладываются по ячейкам «лист куба × ячейка сетки» одним bincount,
+    затем значения 'All' получаются суммированием по измерениям (гистограммы аддитивны),
+    и каждая сетка сглаживается со своей шириной ядра.
+
+    Args:
+        df (pd.DataFrame): Датасет бросков с категориальными столбцами CUBE_DIMS, bool goal и pred_proba.
+        x (np.ndarray): Координаты бросков по длине площадки, м.
+        y (np.ndarray): Координаты бросков по ширине площадки, м.
+
+    Returns:
+        dict: {'values': {измерение: список значений с 'All' в конце}, 'grids': float16 массив,
+               'counts': число бросков в каждой ячейке куба}.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    values = {dim: [str(v) for v in df[dim].cat.categories] for dim in CUBE_DIMS}
+    sizes = [len(values[dim]) for dim in CUBE_DIMS] + [2]
+
+    codes = [df[dim].cat.codes.to_numpy().astype(np.int64) for dim in CUBE_DIMS]
+    codes.append(df['goal'].to_numpy().astype(np.int64))
+    leaf = np.ravel_multi_index(codes, sizes)
+    n_leaves = int(np.prod(sizes))
+
+    bins = bin_index(x, y)
+    inside = bins >= 0
+    flat = leaf[inside] * (NX * NY) + bins[inside]
+
+    def leaf_hist(w):
+        hist = np.bincount(flat, weights=w[inside], minlength=n_leaves * NX * NY)
+        return hist.reshape(sizes + [NY, NX]).astype(np.float32)
+
+    def leaf_moments(w):
+        fields = (w, w * w, w * x, w * x * x, w * y, w * y * y)
+        return np.stack([np.bincount(leaf, weights=f, minlength=n_leaves) for f in fields], axis=-1).reshape(sizes + [6])
+
+    ones = np.ones_like(x)
+    xg = df['pred_proba'].to_numpy(dtype=np.float64)
+    hist, hist_xg = leaf_hist(ones), leaf_hist(xg)
+    moments, moments_xg = leaf_moments(ones), leaf_moments(xg)
+
+    for axis in range(len(CUBE_DIMS)):
+        hist, hist_xg = _with_totals(hist, axis), _with_totals(hist_xg, axis)
+        moments, moments_xg = _with_totals(moments, axis), _with_totals(moments_xg, axis)
+
+    # Последнее измерение листа: [не гол, гол] -> [броски, голы, xG]
+    g = len(CUBE_DIMS)
+    hist = np.stack([hist.sum(axis=g), hist[..., 1, :, :], hist_xg.sum(axis=g)], axis=g)
+    counts = np.stack([moments[..., 0].sum(axis=g), moments[..., 1, 0], moments[..., 0].sum(axis=g)], axis=g)
+    moments = np.stack([moments.sum(axis=g), moments[..., 1, :], moments_xg.sum(axis=g)], axis=g)
+
+    grids = np.zeros(hist.shape, dtype=np.float16)
+    for cell in itertools.product(*(range(s) for s in hist.shape[:-2])):
+        if counts[cell] >= MIN_SHOTS:
+            grids[cell] = _cell_grid(hist[cell], moments[cell])
+
+    return {'values': {dim: values[dim] + ['All'] for dim in CUBE_DIMS}, 'grids': grids,
+            'counts': counts.astype(np.int64)}
+
+
+def _cell_grid(hist, moments):
+    # Сглаженная сетка одной ячейки куба в float16; нули, если ширину ядра не оценить
+    bandwidth = _bandwidth_from_moments(moments)
+    if bandwidth is None:
+        return 0
+    density = smooth(hist.astype(np.float64), *bandwidth)
+    peak = density.max()
+    # Масштаб плотности не важен для уровней (они считаются по долям массы)
+    return (density / peak).astype(np.float16) if peak > 0 else 0
+
+
+def update_grids(cube, df, x, y, index, start):
+    """
+    Пересчитывает куб после дописывания строк в конец датасета (см. shots_store.append).
+    Пересчитываются только ячейки, в которые попали новые броски: их команды, сезоны,
+    позиции и форматы вместе со значениями 'All'. Остальные сетки не меняются.
+
+    Args:
+        cube (dict): Куб из build_grids() по первым start строкам.
+        df (pd.DataFrame): Датасет целиком, вместе с новыми строками.
+        x (np.ndarray): Координаты всех бросков по длине площадки, м.
+        y (np.ndarray): Координаты всех бросков по ширине площадки, м.
+        index (dict): Индекс shots_index по всему датасету.
+        start (int): Номер первой новой строки.
+
+    Returns:
+        dict | None: Новый куб или None, если в новых строках есть значения, которых нет
+                     в измерениях куба (новая команда или сезон), — тогда куб строится заново.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    tail = df.iloc[start:]
+    positions = []
+    for dim in CUBE_DIMS:
+        values = cube['values'][dim]
+        present = [str(v) for v in tail[dim].unique()]
+        if any(v not in values for v in present):
+            return None
+        positions.append(sorted({values.index(v) for v in present} | {len(values) - 1}))
+
+    grids, counts = cube['grids'].copy(), cube['counts'].copy()
+    xg = df['pred_proba'].to_numpy(dtype=np.float64)
+    bins = bin_index(x, y)
+    for cell in itertools.product(*positions):
+        filters = {dim: cube['values'][dim][i] for dim, i in zip(CUBE_DIMS, cell)}
+        for k, kind in enumerate(KINDS):
+            rows = shots_index.select(index, goal=True if kind == 'goals' else None, **filters)
+            w = xg[rows] if kind == 'xg' else np.ones(len(rows))
+            counts[cell + (k,)] = len(rows)
+            grids[cell + (k,)] = 0
+            if len(rows) < MIN_SHOTS:
+                continue
+            inside = bins[rows] >= 0
+            hist = np.bincount(bins[rows][inside], weights=w[inside], minlength=NX * NY).reshape(NY, NX)
+            grids[cell + (k,)] = _cell_grid(hist, _moments(x[rows], y[rows], w))
+    return {'values': cube['values'], 'grids': grids, 'counts': counts}
+
+
+def grids_stamp():
+    """Отпечаток куба: версия данных в хранилище бросков, поправки координат и версия формата куба."""
+    return f'{shots_store.version()}|{render_cache.file_stamp(shots_store.CALIBRATION_PATH)}|{GRIDS_VERSION}'
+
+
+def save_grids(cube, stamp, path=GRIDS_PATH):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f, grids=cube['grids'], counts=cube['counts'],
+                            values=np.array(json.dumps(cube['values'], ensure_ascii=False)),
+                            __stamp__=np.array(stamp))
+    os.replace(tmp_path, path)
+
+
+def load_grids(df, x, y, path=GRIDS_PATH):
+    """
+    Загружает куб сеток плотности с диска или пересчитывает его, если датасет изменился.
+
+    Returns:
+        dict: Куб в формате build_grids().
+    """
+    stamp = grids_stamp()
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if str(data['__stamp__']) == stamp:
+                return {'values': json.loads(str(data['values'])), 'grids': data['grids'], 'counts': data['counts']}
+    except (OSError, KeyError, ValueError):
+        pass
+    cube = build_grids(df, x, y)
+    save_grids(cube, stamp, path)
+    return cube
+
+
+def lookup(cube, team, season, pos, format, kind):
+    """
+    Готовая сетка плотности для комбинации фильтров.
+
+    Returns:
+        np.ndarray | None: Плотность или None, если комбинации нет в кубе
+                           (например, несколько сезонов сразу) или бросков слишком мало.
+    """
+    if isinstance(season, (list, tuple)):
+        if len(season) != 1:
+            return None
+        season = season[0]
+    cell = []
+    for dim, value in zip(CUBE_DIMS, (team, season, pos, format)):
+        try:
+            cell.append(cube['values'][dim].index(str(value)))
+        except ValueError:
+            return None
+    if kind not in KINDS:
+        return None
+    cell.append(KINDS.index(kind))
+    cell = tuple(cell)
+    if cube['counts'][cell] < MIN_SHOTS:
+        return None
+    return cube['grids'][cell].astype(np.float32)
@@ -0,0 +1,138 @@
+import numpy as np
+
+# Индекс фильтров по датасету бросков.
+# Для каждого измерения (команда, сезон, позиция, игрок, формат, этап, гол) и каждого его значения
+# заранее хранится отсортированный массив номеров строк. Комбинация фильтров отвечается
+# пересечением этих массивов, начиная с самого короткого, — без прохода по всему DataFrame.
+DIMENSIONS = ['team', 'season', 'pos', 'player_name', 'format', 'stage', 'goal']
+
+
+def build(df):
+    """
+    Строит индекс по датасету бросков.
+
+    Args:
+        df (pd.DataFrame): Датасет из shots_store.load() (категориальные столбцы, bool goal).
+
+    Returns:
+        dict: {'rows': число строк, измерение: {значение: np.ndarray номеров строк}}.
+    """
+    index = {'rows': len(df)}
+    for dim in DIMENSIONS:
+        if dim not in df.columns:
+            continue
+        column = df[dim]
+        if hasattr(column, 'cat'):
+            codes = column.cat.codes.to_numpy()
+            values = list(column.cat.categories)
+        else:
+            values, codes = _factorize(column.to_numpy())
+        index[dim] = _postings(codes, values)
+    return index
+
+
+def extend(index, df, start):
+    """
+    Дописывает в индекс строки, добавленные в конец датасета (см. shots_store.append).
+    Номера новых строк больше всех старых, поэтому списки строк остаются отсортированными
+    простым дописыванием в конец — без перестройки индекса по всему датасету.
+
+    Args:
+        index (dict): Индекс из build() по первым start строкам.
+        df (pd.DataFrame): Датасет целиком, вместе с новыми строками.
+        start (int): Номер первой новой строки.
+
+    Returns:
+        dict: Новый индекс (старый не меняется, его могут читать другие потоки).
+    """
+    tail = build(df.iloc[start:])
+    extended = {'rows': len(df)}
+    for dim in DIMENSIONS:
+        if dim not in tail:
+            continue
+        postings = dict(index.get(dim, {}))
+        for value, rows in tail[dim].items():
+            if len(rows):
+                old = postings.get(value, np.empty(0, dtype=np.int32))
+                postings[value] = np.concatenate([old, (rows + start).astype(np.int32)])
+        extended[dim] = postings
+    return extended
+
+
+def _factorize(array):
+    values, codes = np.unique(array, return_inverse=True)
+    return list(values), codes
+
+
+def _postings(codes, values):
+    # Одна стабильная сортировка даёт для каждого значения уже отсортированный список строк
+    order = np.argsort(codes, kind='stable').astype(np.int32)
+    counts = np.bincount(codes[codes >= 0], minlength=len(values))
+    skipped = int((codes < 0).sum())  # пропуски (код -1) оказываются в начале
+    bounds = np.concatenate([[0], np.cumsum(counts)]) + skipped
+    return {value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(values)}
+
+
+def lookup(index, dim, value):
+    """
+    Списки строк для одного измерения.
+
+    Args:
+        index (dict): Индекс из build().
+        dim (str): Измерение из DIMENSIONS.
+        value: Значение или список значений (объединяются). None/'All' — без фильтра.
+
+    Returns:
+        list | None: Отсортированные массивы номеров строк (по одному на значение)
+                     или None, если фильтра нет.
+    """
+    if value is None or value == 'All':
+        return None
+    postings = index.get(dim, {})
+    values = value if isinstance(value, (list, tuple, set)) else [value]
+    if 'All' in values:
+        return None
+    return [postings[v] for v in values if v in postings]
+
+
+def select(index, **filters):
+    """
+    Номера строк, удовлетворяющих всем фильтрам.
+
+    Args:
+        index (dict): Индекс из build().
+        **filters: измерение=значение, например team='Трактор', season=['2025', '2026'], goal=True.
+
+    Returns:
+        np.ndarray: Отсортированные номера строк (для df.iloc / np.take).
+    """
+    dims = [lookup(index, dim, value) for dim, value in filters.items()]
+    dims = [parts for parts in dims if parts is not None]
+    if not dims:
+        return np.arange(index['rows'], dtype=np.int32)
+
+    # Пересекаем от самого короткого измерения: стоимость зависит от размера выборки, а не датасета.
+    # Объединение значений (например, нескольких сезонов) строится только для самого короткого,
+    # для остальных кандидаты просто ищутся в каждом списке по отдельности.
+    dims.sort(key=lambda parts: sum(len(p) for p in parts))
+    first = dims[0]
+    if not first:
+        return np.empty(0, dtype=np.int32)
+    rows = np.sort(np.concatenate(first)) if len(first) > 1 else first[0]
+    for parts in dims[1:]:
+        if len(rows) == 0:
+            break
+        keep = np.zeros(len(rows), dtype=bool)
+        for sorted_rows in parts:
+            keep |= _contains(sorted_rows, rows)
+        rows = rows[keep]
+    return rows
+
+
+def _contains(sorted_rows, candidates):
+    # Бинарный поиск кандидатов в отсортированном списке: O(k log n) для k кандидатов
+    if len(sorted_rows) == 0:
+        return np.zeros(len(candidates), dtype=bool)
+    pos = np.searchsorted(sorted_rows, candidates)
+    pos[pos == len(sorted_rows)] = 0
+    return sorted_rows[pos] == candidates
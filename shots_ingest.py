@@ -0,0 +1,116 @@
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+import shots_density
+import shots_index
+import shots_store
+
+# Догрузка новых игр в датасет бросков без пересборки и без перезапуска приложения.
+# Файлы игр (схема xg_prediction25.csv, ключ — столбец game) кладутся в shots_store.GAMES_DIR.
+# Новые строки дописываются в конец хранилища, индекс фильтров дописывается, а в кубе сеток
+# плотности пересчитываются только ячейки затронутых команд, сезонов, позиций и форматов.
+# Журнал shots_store.INGESTED_PATH пишется последним: по нему процессы пула
+# (shots_map.dataset) и ключи кэша картинок узнают о новой версии данных.
+# Писатель должен быть один: команда python shots_ingest.py или фоновый процесс с --watch.
+WATCH_INTERVAL = 30  # как часто фоновая задача проверяет GAMES_DIR, с
+
+
+def _log(message):
+    print(message, flush=True)
+
+
+def pending(games_dir=shots_store.GAMES_DIR):
+    """Файлы игр из GAMES_DIR, которые ещё не догружены."""
+    if not os.path.isdir(games_dir):
+        return []
+    done = {entry['file'] for entry in shots_store.ingested()}
+    return sorted(os.path.join(games_dir, name) for name in os.listdir(games_dir)
+                  if name.endswith('.csv') and name not in done)
+
+
+def ingest(paths=None, log=_log):
+    """
+    Дописывает файлы игр в хранилище бросков, индекс и сетки плотности.
+
+    Args:
+        paths (list | None): CSV игр внутри GAMES_DIR; по умолчанию — все ещё не догруженные.
+        log (callable): Куда писать итог.
+
+    Returns:
+        dict: {'files': файлов, 'games': новых игр, 'rows': новых строк, 'seconds': общее время}.
+              Игры, которые уже есть в датасете, пропускаются.
+    """
+    paths = pending() if paths is None else list(paths)
+    for path in paths:
+        # В журнал пишется только имя файла: при пересборке хранилища он ищется в GAMES_DIR
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(shots_store.GAMES_DIR):
+            raise ValueError(f'файл игры должен лежать в {shots_store.GAMES_DIR}: {path}')
+    stats = {'files': len(paths), 'games': 0, 'rows': 0}
+    if not paths:
+        return stats
+    start_time = time.perf_counter()
+
+    old = shots_store.load()
+    parts = shots_store.read_games(paths, set(old['game'].astype(str)))
+    new = pd.concat([part for _, part in parts], ignore_index=True)
+    stats['games'] = int(new['game'].nunique())
+    stats['rows'] = len(new)
+
+    if len(new):
+        cube = shots_density.load_grids(old, old['x_rink'].to_numpy(), old['y_rink'].to_numpy())
+        start = shots_store.append(new)
+        df = shots_store.load()
+        index = shots_index.extend(shots_index.build(old), df, start)
+        x, y = df['x_rink'].to_numpy(), df['y_rink'].to_numpy()
+        updated = shots_density.update_grids(cube, df, x, y, index, start)
+        if updated is None:
+            # Новая команда или сезон: у куба меняются измерения, он строится заново
+            updated = shots_density.build_grids(df, x, y)
+        shots_density.save_grids(updated, shots_density.grids_stamp())
+
+    entries = [{'file': os.path.basename(path), 'games': [str(g) for g in part['game'].unique()],
+                'rows': len(part)} for path, part in parts]
+    _write_ingested(shots_store.ingested() + entries)
+
+    stats['seconds'] = time.perf_counter() - start_time
+    log(f'догружено файлов: {stats["files"]}, новых игр: {stats["games"]}, строк: {stats["rows"]} '
+        f'за {stats["seconds"]:.1f} с')
+    return stats
+
+
+def _write_ingested(entries, path=shots_store.INGESTED_PATH):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(entries, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def watch(interval=WATCH_INTERVAL):
+    """
+    Фоновая догрузка: каждые interval секунд забирает новые файлы из GAMES_DIR.
+    Запускается отдельным процессом (python -m shots_ingest --watch, или INGEST=1 python app.py):
+    догрузка пересчитывает куб сеток плотности, и веб-процессу незачем держать его в памяти.
+    Процесс завершается вместе с родителем — после перезапуска приложения писатель остаётся один.
+    """
+    parent = os.getppid()
+    while os.getppid() == parent:
+        try:
+            if pending():
+                ingest()
+        except Exception as e:
+            # Файл с ошибкой не записан в журнал: попробуем снова в следующий раз
+            _log(f'догрузка игр не удалась: {e!r}')
+        time.sleep(interval)
+
+
+if __name__ == '__main__':
+    # python shots_ingest.py [файлы игр] — по умолчанию все новые файлы из GAMES_DIR;
+    # python shots_ingest.py --watch — забирать новые файлы, пока жив родительский процесс
+    if sys.argv[1:] == ['--watch']:
+        watch()
+    else:
+        ingest(sys.argv[1:] or None)
@@ -1,45 +1,54 @@
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import pandas as pd
 import numpy as np
 import os
-import seaborn as sns
+import functools
 import matplotlib.patches as patches
+from matplotlib.collections import LineCollection
+from matplotlib.path import Path
 from matplotlib.offsetbox import OffsetImage, AnnotationBbox
 import matplotlib.image as mpimg
+import data_sources
+import render_cache
+import render_options
+import shots_data
+import shots_store
+import shots_density
+import shots_zones
 
 pd.set_option('display.max_columns', None)
 pd.set_option('display.max_rows', None)
 pd.set_option('display.width', 1000)
 
-def gg_rink(side="right", specs="nhl", ax=None):
+# исходные файлы, от которых зависят карты (для кэша)
+SOURCES = shots_store.SOURCES
+
+@functools.lru_cache(maxsize=None)
+def rink_layer(side="right", specs="nhl"):
     """
-    Рисует хоккейную площадку (половину или полную) по стандартам NHL или IIHF.
+    Строит геометрию хоккейной площадки один раз для пары (side, specs).
+    Площадка не меняется между запросами, поэтому все линии, дуги и круги
+    считаются один раз и дальше переиспользуются в gg_rink.
 
     Args:
-        side (str): Какую сторону нарисовать: "right" (по умолчанию) или "left".
-                    "Right" = от центра до правой доски.
-        specs (str): Какие спецификации использовать: "nhl" (по умолчанию) или "iihf".
+        side (str): "right" или "left".
+        specs (str): "nhl" или "iihf".
 
     Returns:
-        matplotlib.figure.Figure: Объект фигуры Matplotlib с нарисованной площадкой.
+        dict: 'lines' — список (стиль, [массивы точек]), сгруппированный по стилю линии;
+              'dots' — {цвет: (x, y)} точек вбрасывания; 'circles' — список (центр, радиус, цвет);
+              'boards' — замкнутый контур бортов половины площадки (Path, для обрезки заливки);
+              'xlim', 'ylim' — границы осей.
     """
 
-    # --- Проверка входных данных ---
-    side = side.lower()
-    specs = specs.lower()
-    if side not in ["right", "left"]:
-        raise ValueError("Параметр 'side' должен быть 'right' или 'left'")
-    if specs not in ["nhl", "iihf"]:
-        raise ValueError("Параметр 'specs' должен быть 'nhl' или 'iihf'")
-
     # Коэффициент стороны: 1 для правой, -1 для левой, 0 для центральной линии
     side_mult = 1 if side == "right" else -1
 
     # Разрешение для кругов и дуг
     nsteps = 1001
-    circle = np.linspace(0, 2 * np.pi, nsteps)
 
     # --- Определение параметров (NHL/IIHF) ---
     if specs == "nhl":
@@ -88,46 +97,36 @@ def gg_rink(side="right", specs="nhl", ax=None):
         nsteps
     )
 
-    # Углы для полукруга площади ворот
-    # Используем немного больший диапазон, чтобы создать замкнутую фигуру.
-    crease_angles_fill = np.linspace(
-        np.pi - np.arccos(crease_end / r_crease),
-        np.pi + np.arccos(crease_end / r_crease),
-        nsteps
-    )
-
-    # Координаты дуги
-    crease_x = x_goal + r_crease * np.cos(crease_angles_fill)
-    crease_y = r_crease * np.sin(crease_angles_fill)
-
-    # Центр дуги (на линии ворот)
-    center_crease_x = x_goal * side_mult
-    center_crease_y = 0
-
     # Координата X для точек вбрасывания
     x_faceoff_dot = x_goal - x_dot_dist
 
     # Угол для хэш-меток
     y_hash = r_faceoff * np.sin(np.arccos((hash_space / 2) / r_faceoff))
 
-    # --- Инициализация графика ---
-    if ax is None:
-        fig, ax = plt.subplots(figsize=(10, 12))
-
     # Определение границ графика
     x_lim = x_max if side == "right" else x_max * 2
-    ax.set_xlim(-0.5 * x_lim, x_lim * side_mult + 0.5 * x_lim)
-    ax.set_ylim(y_min - 1, y_max + 1)
+    xlim = (-0.5 * x_lim, x_lim * side_mult + 0.5 * x_lim)
+    ylim = (y_min - 1, y_max + 1)
 
-    # Установка белого фона и скрытие осей
-    ax.set_facecolor("white")
-    ax.axis('off')
+    # Линии группируются по стилю (цвет, толщина, тип, zorder): одна коллекция на стиль
+    lines = {}
+    dots = {}
+    circles = []
 
-    # --- Рисование элементов площадки ---
+    def add_path(x, y, color='black', linewidth=1, linestyle='solid', zorder=2):
+        points = np.column_stack([np.atleast_1d(x), np.atleast_1d(y)]).astype(float)
+        lines.setdefault((color, linewidth, linestyle, zorder), []).append(points)
 
     # Вспомогательная функция для рисования линий
     def draw_line(x1, y1, x2, y2, color='black', linewidth=1, linestyle='solid'):
-        ax.plot([x1, x2], [y1, y2], color=color, linewidth=linewidth, linestyle=linestyle)
+        add_path([x1, x2], [y1, y2], color=color, linewidth=linewidth, linestyle=linestyle)
+
+    def add_dot(x, y, color):
+        xs, ys = dots.setdefault(color, ([], []))
+        xs.append(x)
+        ys.append(y)
+
+    # --- Рисование элементов площадки ---
 
     # 1. Синяя линия
     draw_line(x_blue * side_mult, y_max, x_blue * side_mult, y_min, color="blue", linewidth=2)
@@ -137,7 +136,7 @@ def gg_rink(side="right", specs="nhl", ax=None):
         draw_line(0, y_max, 0, y_min, color="red", linewidth=2)
 
         # Центральный dot
-        ax.plot(0, 0, 'o', color="blue", markersize=4)
+        add_dot(0, 0, "blue")
 
         # Пунктирная/сплошная белая линия поверх красной (NHL/IIHF)
         if specs == "nhl":
@@ -147,9 +146,9 @@ def gg_rink(side="right", specs="nhl", ax=None):
 
         # Центральный круг вбрасывания (только полукруг в правой части)
         center_circle_angles = np.linspace(np.pi / 2, -np.pi / 2, nsteps)
-        ax.plot(r_faceoff * np.cos(center_circle_angles) * side_mult,
-                r_faceoff * np.sin(center_circle_angles),
-                color="blue")
+        add_path(r_faceoff * np.cos(center_circle_angles) * side_mult,
+                 r_faceoff * np.sin(center_circle_angles),
+                 color="blue", linewidth=1.5)
 
     # 3. Боковые борта
     draw_line(0 * side_mult, y_min, (x_max - r_corner) * side_mult, y_min, linewidth=1)
@@ -160,8 +159,16 @@ def gg_rink(side="right", specs="nhl", ax=None):
     y_arc_top = (y_max - r_corner) + r_corner * np.sin(curve_angle)
     y_arc_bottom = -((y_max - r_corner) + r_corner * np.sin(curve_angle))
 
-    ax.plot(x_arc * side_mult, y_arc_top, linewidth=1, color = 'black')
-    ax.plot(x_arc * side_mult, y_arc_bottom, linewidth=1, color = 'black')
+    add_path(x_arc * side_mult, y_arc_top, linewidth=1, color='black')
+    add_path(x_arc * side_mult, y_arc_bottom, linewidth=1, color='black')
+
+    # Контур бортов: от центральной линии вдоль верхнего борта, через скругления и торцевой борт обратно
+    boards = np.concatenate([
+        [[0, y_max]],
+        np.column_stack([x_arc, y_arc_top]),
+        np.column_stack([x_arc[::-1], y_arc_bottom[::-1]]),
+        [[0, y_min], [0, y_max]],
+    ]) * [side_mult, 1]
 
     # 5. Конечные борта (прямой участок)
     draw_line(x_max * side_mult, y_curve_end, x_max * side_mult, -y_curve_end, linewidth=1)
@@ -172,59 +179,12 @@ def gg_rink(side="right", specs="nhl", ax=None):
     y_goal = (y_max - r_corner) + r_corner * np.sin(goal_angle)
     draw_line(x_goal * side_mult, y_goal, x_goal * side_mult, -y_goal, color="red")
 
-    # 7. Площадь ворот (Crease) - ЗАЛИВКА
-
-    # 7а. Заливка ПОЛУКРУГЛОЙ ЧАСТИ (Arc/Wedge)
-    # Используем patches.Wedge для залитой дуги
-
-    # Центр дуги находится на линии ворот (x_goal)
-    center_x_crease = x_goal * side_mult
-    center_y_crease = 0
-
-    # Углы для Wedge (в градусах)
-    # Начальная точка полукруга (на x_goal - crease_end)
-    angle_start = np.degrees(np.pi - np.arccos(crease_end / r_crease))
-    # Конечная точка полукруга
-    angle_end = np.degrees(np.pi + np.arccos(crease_end / r_crease))
-
-    # # Создаем КЛИН (Wedge)
-    # crease_wedge = patches.Wedge(
-    #     (center_x_crease, center_y_crease),
-    #     r_crease,
-    #     angle_start,
-    #     angle_end,
-    #     facecolor='blue',
-    #     edgecolor='none',
-    #     zorder=1  # Ниже линий, выше фона
-    # )
-    # ax.add_patch(crease_wedge)
-    #
-    # # 7б. Заливка ПРЯМОУГОЛЬНОЙ ЧАСТИ ("Ножки" Crease)
-    #
-    # # Координаты для прямоугольника (от линии ворот до x_goal - crease_end)
-    # x_rect_start = (x_goal - crease_end) * side_mult
-    # y_rect_bottom = -crease_start_y
-    #
-    # width_rect = crease_end
-    # height_rect = 2 * crease_start_y
-    #
-    # # Прямоугольник (x, y - нижний левый угол)
-    # rect_crease_fill = patches.Rectangle(
-    #     (x_rect_start, y_rect_bottom),
-    #     width_rect * side_mult,  # Ширина должна быть положительной/отрицательной в зависимости от side_mult
-    #     height_rect,
-    #     facecolor='blue',
-    #     edgecolor='none',
-    #     zorder=1
-    # )
-    # ax.add_patch(rect_crease_fill)
-
-    # 7в. Рисование КРАСНЫХ контурных линий поверх заливки (ZORDER=2)
+    # 7. Площадь ворот (Crease) - контур
 
     # Полукруг (контур)
     crease_x_plot = x_goal + r_crease * np.cos(crease_angles)
     crease_y_plot = r_crease * np.sin(crease_angles)
-    ax.plot(crease_x_plot * side_mult, crease_y_plot, color="red", linewidth=1.5, zorder=2)
+    add_path(crease_x_plot * side_mult, crease_y_plot, color="red", linewidth=1.5, zorder=2)
 
     # Боковые линии площади ворот
     draw_line(x_goal * side_mult, crease_start_y, (x_goal - crease_end) * side_mult, crease_start_y, color="red")
@@ -255,15 +215,13 @@ def gg_rink(side="right", specs="nhl", ax=None):
         x_dot = x_faceoff_dot * side_mult
 
         # Dot
-        ax.plot(x_dot, y_dot, 'o', color="red", markersize=4)
+        add_dot(x_dot, y_dot, "red")
 
         # Circle
-        circle_patch = patches.Circle((x_dot, y_dot), r_faceoff, edgecolor='red', facecolor='none')
-        ax.add_patch(circle_patch)
+        circles.append(((x_dot, y_dot), r_faceoff, 'red'))
 
         # 10. Хэш-метки (Hashes)
         hash_x_base = x_faceoff_dot + hash_space / 2
-        # print(hash_x_base)
         hash_y_start = y_dot + y_hash
         hash_y_end = y_dot + y_hash + hash_length
 
@@ -303,213 +261,276 @@ def gg_rink(side="right", specs="nhl", ax=None):
         # Линия в конце борта
         draw_line(x_max * side_mult, y_traps_end_y, x_max * side_mult, -y_traps_end_y, color="red")
 
-    # 13. Судейская площадь (Ref Crease)
-    # ref_angles = np.linspace(np.pi / 2, 0, nsteps)
-    # ref_x = r_ref * np.cos(ref_angles)
-    # ref_y = y_min + r_ref * np.sin(ref_angles)
-    # ax.plot(ref_x * side_mult, ref_y, color="red")
-
     # 14. Точки вбрасывания в нейтральной зоне
     if side == "right":
         x_dot_n = (x_blue - x_dot_neutral)
         for sign in [1, -1]:
-            ax.plot(x_dot_n, sign * y_faceoff_dot, 'o', color="red", markersize=4)
+            add_dot(x_dot_n, sign * y_faceoff_dot, "red")
+
+    return {
+        'lines': list(lines.items()),
+        'dots': {color: (np.array(xs), np.array(ys)) for color, (xs, ys) in dots.items()},
+        'circles': circles,
+        'boards': Path(boards, closed=True),
+        'xlim': xlim,
+        'ylim': ylim,
+    }
+
+
+def gg_rink(side="right", specs="nhl", ax=None):
+    """
+    Рисует хоккейную площадку (половину или полную) по стандартам NHL или IIHF.
+    Геометрия берётся из кэша rink_layer, на оси добавляется лишь несколько коллекций линий.
+
+    Args:
+        side (str): Какую сторону нарисовать: "right" (по умолчанию) или "left".
+                    "Right" = от центра до правой доски.
+        specs (str): Какие спецификации использовать: "nhl" (по умолчанию) или "iihf".
+
+    Returns:
+        matplotlib.figure.Figure: Объект фигуры Matplotlib с нарисованной площадкой.
+    """
+
+    # --- Проверка входных данных ---
+    side = side.lower()
+    specs = specs.lower()
+    if side not in ["right", "left"]:
+        raise ValueError("Параметр 'side' должен быть 'right' или 'left'")
+    if specs not in ["nhl", "iihf"]:
+        raise ValueError("Параметр 'specs' должен быть 'nhl' или 'iihf'")
+
+    layer = rink_layer(side, specs)
+
+    # --- Инициализация графика ---
+    if ax is None:
+        fig = Figure(figsize=(10, 12))
+        # Своя Agg-канва на каждый запрос: без глобального состояния pyplot, можно рисовать из разных потоков
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+
+    ax.set_xlim(*layer['xlim'])
+    ax.set_ylim(*layer['ylim'])
+
+    # Установка белого фона и скрытие осей
+    ax.set_facecolor("white")
+    ax.axis('off')
+
+    # Одна коллекция на стиль линии вместо десятков отдельных ax.plot
+    for (color, linewidth, linestyle, zorder), paths in layer['lines']:
+        ax.add_collection(LineCollection(paths, colors=color, linewidths=linewidth,
+                                         linestyles=linestyle, zorder=zorder), autolim=False)
+
+    for center, radius, color in layer['circles']:
+        ax.add_patch(patches.Circle(center, radius, edgecolor=color, facecolor='none'))
+
+    for color, (xs, ys) in layer['dots'].items():
+        ax.plot(xs, ys, 'o', color=color, markersize=4)
 
     ax.set_aspect('equal', adjustable='box')
     # plt.title(f'Хоккейная площадка ({specs.upper()} - {side.capitalize()} Side)', fontsize=14)
-    plt.tight_layout()
+    ax.figure.tight_layout()
 
     if ax.figure is not None:
         return ax.figure, ax
     else:
         return None, ax
 
-df = pd.read_csv(r'static\csv\xg_prediction.csv', index_col=0)
-df25 = pd.read_csv(r'static\csv\xg_prediction25.csv', index_col=0)
+# Данные бросков и отбор под фильтры живут в shots_data (их читает и веб-процесс),
+# здесь — только то, что нужно для картинок
+poses = shots_data.poses
+map_types = shots_data.map_types
+source = shots_data.source
+select_shots = shots_data.select_shots
 
 
+def _load_grids(previous):
+    # Куб сеток плотности — отдельный снимок с теми же исходными файлами, что и у 'shots':
+    # его загружает только процесс, который рисует тепловые карты.
+    # Сетки после дописывания уже пересчитаны shots_ingest и лежат на диске с новой версией
+    df = source().data['df']
+    return shots_density.load_grids(df, df['x_rink'].to_numpy(), df['y_rink'].to_numpy())
 
-df = pd.concat([df,df25])
-df.reset_index(inplace=True)
-df['format'] = df.apply(lambda row: 'PP' if row['format_PP'] == True else 'PK' if row['format_PP'] == True else 'EV', axis=1)
-df['pos'] = df.apply(lambda row: 'н' if row['pos_н'] == True else 'з', axis=1)
-df['season'] = df['season'].apply(lambda x: str(x)[:4])
-df = df[['player_name','game','team','x','y', 'goal', 'team2','stage','home','pos','format','time', 'pred_proba', 'season']]
-# print(df.head())
-poses = {'нападающие':'н','защитники':'з','All':'All'}
-map_types = {'Броски':'shots','Голы':'goals','All':'All'}
-def generate_heat_map(season, stage, pos, format, graphic, map_type, team, player, df=df, ax=None, DATA_X_MAX=500, DATA_Y_MAX=500, RINK_X_MAX = 30, RINK_Y_MAX = 32):
 
-    pos = poses[pos]
-    map_type=map_types[map_type]
-    if player == None or player == 'None':
-        player = 'All'
-    print(season, stage, pos, format, graphic, map_type, team, player)
-    if type(season) != list:
-        season = [season]
-    # 0. Отбор необходимых данных для формирования тепловых карт из датасета
-    # 0.1 На уровне команд
-    filename = ''
-
-    if team != 'All':
-        filename = team
-        df = df[df['team']==team]
-
-    # 0.2 На уровне сезона
-    if season != 'All':
-        for seasons in season:
-            filename += '_'+str(seasons)
-        df = df[df['season'].isin(season)]
-    # 0.3 На уровне позиции
-    if pos != 'All':
-        filename += '_' + str(pos)
-        df = df[df['pos']==pos]
-    # 0.4 На уровне игрока
-    if player != 'All':
-        filename += '_' + str(player)
-        df = df[df['player_name']==player]
-    # 0.5 На уровне формата игры All/EV/PP
-    if format != 'All':
-        filename += '_' + str(format)
-        df = df[df['format']==format]
-
-    # 0.6 На уровне этапа плей-офф/регулярный сезон
-    # if stage != 'All':
-    #     # filename += '_' + str(format)
-    #     df = df[df['stage'] == stage]
-
-    # Исходя из типа графики броски или голы
-    if map_type != 'shots':
-        filename += '_goals_heat_map.png'
-        df = df[df['goal']==True]
+data_sources.register('shot_grids', SOURCES, _load_grids)
 
-    else:
-        filename += '_shots_heat_map.png'
-    # 1. Создание коэффициентов масштабирования
-    scale_x = RINK_X_MAX / DATA_X_MAX
-    scale_y = RINK_Y_MAX / DATA_Y_MAX
 
-    # 2. Масштабирование исходного DataFrame
+def grids(snapshot):
+    """
+    Куб сеток плотности (см. shots_density.py) для снимка датасета.
 
+    Returns:
+        dict | None: Куб или None, если сетки уже построены по другой версии данных
+                     (файлы обновились между загрузками) — тогда плотность считается на лету.
+    """
+    current = data_sources.get('shot_grids')
+    return current.data if current.version == snapshot.version else None
 
-    # Масштабирование:
-    df_scaled = pd.DataFrame()
-    # Масштабируем X (длина) к 0-100.
-    df_scaled['x_rink'] = ((500 - df['x']+32)) * scale_x/1.15
-    # Масштабируем Y (ширина) к -42.5 до 42.5.
-    # Чтобы Y был центрирован вокруг 0, сначала центрируем исходные данные:
-    df_scaled['y_rink'] = ((500 - df['y']) - DATA_Y_MAX / 2) * scale_y/1.1
 
-    # Строим схему
-    fig, ax = gg_rink(side="right", specs="iihf", ax=ax) # Используем функцию, которую мы разработали
-    logos_path = r"static\images\logos"
-    max_size = 80  # ограничение по ширине/высоте
+def dataset():
+    """
+    Датасет бросков и всё, что из него строится, из текущего снимка.
 
-    # 2. Строим тепловую карту
-    kde = sns.kdeplot(
-        data=df_scaled,
-        x='x_rink',
-        y='y_rink',
-        fill=True,  # Заливка области плотности цветом
-        cmap="RdPu",  # Выбираем яркую цветовую схему
-        thresh=0.08,  # Убираем шум, устанавливая минимальный порог
-        levels=10,  # Количество линий уровня (больше линий = более плавный вид),
-        ax=ax,  # Обязательно накладываем на оси схемы
-        zorder=3,  # Уровень отрисовки (поверх схемы, но ниже аннотаций)
-        alpha=0.6,
-        cbar=False
-    )
+    Returns:
+        tuple: (df из колоночного хранилища (см. shots_store.py),
+                индекс фильтров (см. shots_index.py),
+                сетки плотности для типового куба фильтров (см. shots_density.py)).
+    """
+    snapshot = source()
+    return snapshot.data['df'], snapshot.data['index'], grids(snapshot)
 
-    # plt.title(f'Тепловая карта распределения бросков\n сезон - {season}, команда - {team}, позиция - {pos}, игрок - {player}')
-    plt.xlabel('Значения y')
-    plt.ylabel('Значения x')
-    # plt.colorbar()
-    # plt.show()
-    filepath = r'static\images\heat_map.png'
-    # filepath = os.path.join(filepath,filename)
-    plt.savefig(filepath, bbox_inches='tight')
+
+def warm():
+    """Загружает датасет и сетки плотности заранее (вызывается при старте процесса пула отрисовки)."""
+    dataset()
 
 
+DEFAULT_QUALITY = 'screen'
 
-def generate_heat_map_points(season, stage, pos, format, graphic, map_type, team, player, df=df, ax=None, DATA_X_MAX=500, DATA_Y_MAX=500, RINK_X_MAX = 30, RINK_Y_MAX = 32):
-    if player == None or player == 'None':
-        player = 'All'
+
+def generate_heat_map(season, stage, pos, format, graphic, map_type, team, player,
+                      quality=DEFAULT_QUALITY, fmt=render_options.DEFAULT_FORMAT):
+    """
+    Возвращает id тепловой карты для набора фильтров.
+    Id выводится из фильтров и данных, картинка пишется атомарно под своим именем,
+    поэтому параллельные запросы с разными фильтрами не затирают друг друга.
+    quality и fmt — пресет разрешения и формат из render_options.
+    """
+    filters = dict(season=season, stage=stage, pos=pos, format=format, graphic=graphic,
+                   map_type=map_type, team=team, player=player, quality=quality, fmt=fmt)
+    # ключ и картинка строятся по одному снимку данных, даже если они обновятся во время отрисовки
+    snapshot = source()
+    return render_cache.get_or_render('generate_heat_map', filters, snapshot.stamps,
+                                      lambda path: render_heat_map(output_path=path, snapshot=snapshot, **filters),
+                                      ext=fmt)
+
+
+def generate_heat_map_points(season, stage, pos, format, graphic, map_type, team, player,
+                             quality=DEFAULT_QUALITY, fmt=render_options.DEFAULT_FORMAT):
+    """Возвращает id точечной карты бросков для набора фильтров (см. generate_heat_map)."""
+    filters = dict(season=season, stage=stage, pos=pos, format=format, graphic=graphic,
+                   map_type=map_type, team=team, player=player, quality=quality, fmt=fmt)
+    snapshot = source()
+    return render_cache.get_or_render('generate_heat_map_points', filters, snapshot.stamps,
+                                      lambda path: render_heat_map_points(output_path=path, snapshot=snapshot,
+                                                                          **filters),
+                                      ext=fmt)
+
+
+def generate_zone_map(season, stage, pos, format, graphic, map_type, team, player,
+                      quality=DEFAULT_QUALITY, fmt=render_options.DEFAULT_FORMAT):
+    """Возвращает id карты зон бросков для набора фильтров (см. generate_heat_map)."""
+    filters = dict(season=season, stage=stage, pos=pos, format=format, graphic=graphic,
+                   map_type=map_type, team=team, player=player, quality=quality, fmt=fmt)
+    snapshot = source()
+    return render_cache.get_or_render('generate_zone_map', filters, snapshot.stamps,
+                                      lambda path: render_zone_map(output_path=path, snapshot=snapshot, **filters),
+                                      ext=fmt)
+
+
+def render_heat_map(season, stage, pos, format, graphic, map_type, team, player, output_path, df=None, index=None, ax=None,
+                   quality=DEFAULT_QUALITY, fmt=render_options.DEFAULT_FORMAT, snapshot=None):
     print(season, stage, pos, format, graphic, map_type, team, player)
-    pos = poses[pos]
-    map_type=map_types[map_type]
-    if type(season) != list:
-        season = [season]
-    # 0. Отбор необходимых данных для формирования тепловых карт из датасета
-    # 0.1 На уровне команд
-    filename = ''
-
-    if team != 'All':
-        filename = team
-        df = df[df['team']==team]
-    # 0.2 На уровне сезона
-    if season != 'All':
-        for seasons in season:
-            filename += '_'+str(seasons)
-        df = df[df['season'].isin(season)]
-    # 0.3 На уровне позиции
-    if pos != 'All':
-        filename += '_' + str(pos)
-        df = df[df['pos']==pos]
-    # 0.4 На уровне игрока
-    if player != 'All':
-        filename += '_' + str(player)
-        df = df[df['player_name']==player]
-    # 0.5 На уровне формата игры All/EV/PP
-    if format != 'All':
-        filename += '_' + str(format)
-        df = df[df['format']==format]
-    # Исходя из типа графики броски или голы
-    if map_type != 'shots':
-        filename += '_goals_heat_map.png'
-        df = df[df['goal']==True]
-    else:
-        filename += '_xG_map.png'
+    snapshot = snapshot or source()
+    data = snapshot.data
+    if df is None:
+        df, index = data['df'], data['index']
+    # 0. Плотность: готовая сетка из куба фильтров, если она есть
+    density = None
+    cube = grids(snapshot) if player is None or player in ('None', '', 'All') else None
+    if cube is not None:
+        density = shots_density.lookup(cube, team, season, poses[pos], format, map_types[map_type])
+
+    # 1. Иначе отбираем броски и считаем быстрый binned KDE на лету (например, для игрока)
+    if density is None:
+        df = select_shots(season, pos, format, map_type, team, player, df=df, index=index, players=data['players'])
+        # Для карты xG каждый бросок взвешивается своей вероятностью гола
+        weights = df['pred_proba'].to_numpy() if map_types[map_type] == 'xg' else None
+        density = shots_density.binned_kde(df['x_rink'].to_numpy(), df['y_rink'].to_numpy(), weights=weights)
 
-    # 1. Создание коэффициентов масштабирования
-    scale_x = RINK_X_MAX / DATA_X_MAX
-    scale_y = RINK_Y_MAX / DATA_Y_MAX
+    # Строим схему
+    own_figure = ax is None
+    fig, ax = gg_rink(side="right", specs="iihf", ax=ax) # Используем функцию, которую мы разработали
 
-    # 2. Масштабирование исходного DataFrame
+    # 2. Строим тепловую карту
+    if density is not None:
+        shots_density.draw(
+            ax,
+            density,
+            thresh=0.08,  # Убираем шум, устанавливая минимальный порог
+            levels=10,  # Количество линий уровня (больше линий = более плавный вид)
+            cmap="RdPu",  # Выбираем яркую цветовую схему
+            zorder=3,  # Уровень отрисовки (поверх схемы, но ниже аннотаций)
+            alpha=0.6,
+        )
 
+    # plt.title(f'Тепловая карта распределения бросков\n сезон - {season}, команда - {team}, позиция - {pos}, игрок - {player}')
+    ax.set_xlabel('Значения y')
+    ax.set_ylabel('Значения x')
+    render_options.save(fig, output_path, quality, fmt, bbox_inches='tight')
+    if own_figure:
+        fig.clear()
 
-    # Масштабирование:
-    df_scaled = pd.DataFrame()
-    # Масштабируем X (длина) к 0-100.
-    df_scaled['x_rink'] = ((500 - df['x']+32)) * scale_x/1.1
 
-    # Масштабируем Y (ширина) к -42.5 до 42.5.
-    # Чтобы Y был центрирован вокруг 0, сначала центрируем исходные данные:
-    df_scaled['y_rink'] = ((500 - df['y']) - DATA_Y_MAX / 2) * scale_y/1.0
 
-    df_scaled['xG'] = df['pred_proba']
+def render_heat_map_points(season, stage, pos, format, graphic, map_type, team, player, output_path, df=None, index=None, ax=None,
+                          quality=DEFAULT_QUALITY, fmt=render_options.DEFAULT_FORMAT, snapshot=None):
+    print(season, stage, pos, format, graphic, map_type, team, player)
+    data = (snapshot or source()).data
+    if df is None:
+        df, index = data['df'], data['index']
+    # 0. Отбор необходимых данных для формирования карты из датасета
+    df = select_shots(season, pos, format, map_type, team, player, df=df, index=index, players=data['players'])
 
     # Строим схему
+    own_figure = ax is None
     fig, ax = gg_rink(side="right", specs="iihf", ax=ax) # Используем функцию, которую мы разработали
 
     # 2. Строим тепловую карту
-    plt.scatter(
-        x=df_scaled['x_rink'],
-        y=df_scaled['y_rink'],
+    points = ax.scatter(
+        x=df['x_rink'].to_numpy(),
+        y=df['y_rink'].to_numpy(),
         cmap="coolwarm",  # Выбираем яркую цветовую схему
         vmin=0.0, vmax=0.2,
-        c=df_scaled['xG'],
-        # ax=ax,
+        c=df['pred_proba'].to_numpy(),
         zorder=3,  # Уровень отрисовки (поверх схемы, но ниже аннотаций)
         alpha=0.6,
     )
 
     # plt.title(f'Тепловая карта распределения бросков\n сезон - {season}, команда - {team}, позиция - {pos}, игрок - {player}')
-    plt.xlabel('Значения y')
-    plt.ylabel('Значения x')
-    plt.colorbar(shrink=0.3, label = 'xG')
-    # plt.show()
-    filepath = r'static/images/heat_map.png'
-    # filepath = os.path.join(filepath,filename)
-    plt.savefig(filepath, bbox_inches='tight')
-
-# generate_heat_map_points('All','All','All')
\ No newline at end of file
+    ax.set_xlabel('Значения y')
+    ax.set_ylabel('Значения x')
+    fig.colorbar(points, ax=ax, shrink=0.3, label='xG')
+    render_options.save(fig, output_path, quality, fmt, bbox_inches='tight')
+    # Фигура не регистрируется в pyplot и явно очищается — память воркера не растёт от запроса к запросу
+    if own_figure:
+        fig.clear()
+
+
+def render_zone_map(season, stage, pos, format, graphic, map_type, team, player, output_path, df=None, index=None, ax=None,
+                    quality=DEFAULT_QUALITY, fmt=render_options.DEFAULT_FORMAT, snapshot=None):
+    print(season, stage, pos, format, graphic, map_type, team, player)
+    data = (snapshot or source()).data
+    if df is None:
+        df, index = data['df'], data['index']
+    # 0. Для процента реализации нужны все броски, а не только голы
+    df = select_shots(season, pos, format, 'Броски', team, player, df=df, index=index, players=data['players'])
+
+    # 1. Броски по зонам: дальше рисуются только зоны
+    zones = shots_zones.histogram(df['x_rink'].to_numpy(), df['y_rink'].to_numpy(),
+                                  df['goal'].to_numpy(), df['pred_proba'].to_numpy())
+
+    own_figure = ax is None
+    fig, ax = gg_rink(side="right", specs="iihf", ax=ax)
+
+    # 2. Закрашиваем зоны поверх схемы
+    mesh, label = shots_zones.draw(ax, zones, map_type, clip_path=rink_layer("right", "iihf")['boards'],
+                                   zorder=3, alpha=0.7)
+
+    ax.set_xlabel('Значения y')
+    ax.set_ylabel('Значения x')
+    fig.colorbar(mesh, ax=ax, shrink=0.3, label=label)
+    render_options.save(fig, output_path, quality, fmt, bbox_inches='tight')
+    if own_figure:
+        fig.clear()
+
+# generate_heat_map_points('All','All','All')
@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+
+import player_search
+
+# Куб статистики бросков.
+# Датасет один раз сворачивается по всем измерениям DIMENSIONS: в каждой ячейке — число бросков,
+# голов и сумма xG (pred_proba) для одного сочетания игрок/команда/соперник/сезон/этап/позиция/
+# формат/дома. Ячеек в разы меньше, чем бросков, поэтому срезы и сводки (лидеры по xG,
+# реализация команды против соперника и т.п.) считаются по кубу за миллисекунды, без строк df.
+# Измерения хранятся кодами категорий датасета: shots_store дописывает новые значения в конец
+# словаря, так что коды старых ячеек остаются верными и после догрузки игр.
+DIMENSIONS = ['player_name', 'team', 'team2', 'season', 'stage', 'pos', 'format', 'home']
+# Имена измерений в запросах и ответах: как фильтры страницы /shots, соперник — opponent
+PARAMS = {'player': 'player_name', 'team': 'team', 'opponent': 'team2', 'season': 'season',
+          'stage': 'stage', 'pos': 'pos', 'format': 'format', 'home': 'home'}
+MEASURES = ['shots', 'goals', 'xg', 'goals_minus_xg']
+HOME_LABELS = ['away', 'home']  # коды 0/1 столбца home; в сезонах без home — пропуск (-1)
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+
+
+def build(df):
+    """
+    Сворачивает датасет бросков в куб.
+
+    Args:
+        df (pd.DataFrame): Датасет из shots_store.load().
+
+    Returns:
+        dict: 'rows' — сколько строк df учтено; 'labels' — {измерение: значения по кодам};
+              'codes' — {измерение: {значение: код}}; 'cells' — {столбец: np.ndarray}:
+              коды измерений и shots, goals, xg по ячейкам.
+    """
+    frame = pd.DataFrame({dim: _dim_codes(df, dim) for dim in DIMENSIONS})
+    frame['goals'] = df['goal'].to_numpy(dtype=np.int32)
+    frame['xg'] = df['pred_proba'].to_numpy(dtype=np.float64)
+    return _cube(_group(frame, 'size'), df)
+
+
+def update(cube, df, start):
+    """
+    Добавляет в куб строки, дописанные в конец датасета (см. shots_store.append).
+    Сворачиваются только новые строки, затем складываются с ячейками куба.
+
+    Args:
+        cube (dict): Куб из build() по первым start строкам.
+        df (pd.DataFrame): Датасет целиком, вместе с новыми строками.
+        start (int): Номер первой новой строки.
+
+    Returns:
+        dict: Новый куб (старый не меняется, его могут читать другие потоки).
+    """
+    tail = build(df.iloc[start:])
+    frame = pd.concat([pd.DataFrame(cube['cells']), pd.DataFrame(tail['cells'])], ignore_index=True)
+    return _cube(_group(frame, 'sum'), df)
+
+
+def _dim_codes(df, dim):
+    if dim == 'home':
+        home = df['home'].astype('boolean')
+        return np.where(home.isna().to_numpy(), -1, home.fillna(False).to_numpy(dtype=np.int8)).astype(np.int8)
+    return df[dim].cat.codes.to_numpy()
+
+
+def _group(frame, shots):
+    # shots='size' — по строкам бросков, 'sum' — по уже свёрнутым ячейкам
+    measures = {'shots': ('goals', 'size')} if shots == 'size' else {'shots': ('shots', 'sum')}
+    measures.update(goals=('goals', 'sum'), xg=('xg', 'sum'))
+    return frame.groupby(DIMENSIONS, sort=False).agg(**measures).reset_index()
+
+
+def _cube(cells, df):
+    labels = {dim: HOME_LABELS if dim == 'home' else [str(v) for v in df[dim].cat.categories]
+              for dim in DIMENSIONS}
+    columns = {dim: cells[dim].to_numpy() for dim in DIMENSIONS}
+    columns.update(shots=cells['shots'].to_numpy(dtype=np.int64), goals=cells['goals'].to_numpy(dtype=np.int64),
+                   xg=cells['xg'].to_numpy(dtype=np.float64))
+    rows = int(columns['shots'].sum())
+    return {'rows': rows, 'labels': labels,
+            'codes': {dim: {value: code for code, value in enumerate(values)} for dim, values in labels.items()},
+            'cells': columns}
+
+
+def parse(values, players=None):
+    """
+    Разбирает параметры запроса статистики.
+
+    Args:
+        values (Mapping): request.args: фильтры PARAMS (несколько значений — через запятую),
+                          by — измерения сводки через запятую, sort, order (desc/asc),
+                          limit, min_shots.
+        players (dict | None): Индекс player_search: имя игрока ищется так же, как на /shots.
+
+    Returns:
+        dict: Аргументы для query().
+
+    Raises:
+        ValueError: Неизвестное измерение, показатель или параметр страницы.
+    """
+    filters = {}
+    for param in PARAMS:
+        value = values.get(param)
+        if value and value != 'All':
+            filters[param] = [v.strip() for v in value.split(',') if v.strip()]
+    if players is not None and 'player' in filters:
+        filters['player'] = [player_search.resolve(players, name) or name for name in filters['player']]
+    by = [dim for dim in (values.get('by') or '').split(',') if dim]
+    unknown = [dim for dim in by if dim not in PARAMS]
+    if unknown:
+        raise ValueError(f'неизвестное измерение: {", ".join(unknown)}, доступны {", ".join(PARAMS)}')
+    sort = values.get('sort') or 'xg'
+    if sort not in MEASURES:
+        raise ValueError(f'неизвестный показатель: {sort}, доступны {", ".join(MEASURES)}')
+    order = values.get('order') or 'desc'
+    if order not in ('desc', 'asc'):
+        raise ValueError('order: desc или asc')
+    try:
+        limit = int(values.get('limit') or DEFAULT_LIMIT)
+        min_shots = int(values.get('min_shots') or 0)
+    except ValueError:
+        raise ValueError('limit и min_shots должны быть целыми числами')
+    if not 0 < limit <= MAX_LIMIT:
+        raise ValueError(f'нужно 0 < limit <= {MAX_LIMIT}')
+    return dict(filters=filters, by=by, sort=sort, order=order, limit=limit, min_shots=min_shots)
+
+
+def query(cube, filters=None, by=(), sort='xg', order='desc', limit=DEFAULT_LIMIT, min_shots=0):
+    """
+    Срез куба с группировкой по выбранным измерениям.
+
+    Args:
+        cube (dict): Куб из build()/update().
+        filters (dict | None): {параметр из PARAMS: значение или список значений}.
+        by (list): Параметры из PARAMS, по которым сводить (пусто — одна итоговая строка).
+        sort (str): Показатель из MEASURES для сортировки групп.
+        order (str): 'desc' — сначала большие значения, 'asc' — малые.
+        limit (int): Сколько групп вернуть.
+        min_shots (int): Пропустить группы, где бросков меньше.
+
+    Returns:
+        dict: 'total' — показатели всего среза; 'groups' — сколько групп прошло min_shots;
+              'rows' — [{параметры by..., shots, goals, xg, goals_minus_xg}] после сортировки и limit.
+    """
+    cells = cube['cells']
+    mask = np.ones(len(cells['shots']), dtype=bool)
+    for param, value in (filters or {}).items():
+        dim = PARAMS[param]
+        wanted = [cube['codes'][dim].get(str(v), -2) for v in (value if isinstance(value, list) else [value])]
+        mask &= np.isin(cells[dim], wanted)
+
+    shots, goals, xg = cells['shots'][mask], cells['goals'][mask], cells['xg'][mask]
+    total = _measures(shots.sum(), goals.sum(), xg.sum())
+    dims = [PARAMS[param] for param in by]
+    if not dims:
+        return {'total': total, 'groups': 1, 'rows': [total]}
+
+    # Ключ группы — номер ячейки в решётке выбранных измерений (коды сдвинуты на 1: пропуск -1 -> 0)
+    shape = [len(cube['labels'][dim]) + 1 for dim in dims]
+    keys = np.ravel_multi_index([cells[dim][mask].astype(np.int64) + 1 for dim in dims], shape)
+    groups, inverse = np.unique(keys, return_inverse=True)
+    sums = {'shots': np.bincount(inverse, weights=shots, minlength=len(groups)),
+            'goals': np.bincount(inverse, weights=goals, minlength=len(groups)),
+            'xg': np.bincount(inverse, weights=xg, minlength=len(groups))}
+    sums['goals_minus_xg'] = sums['goals'] - sums['xg']
+    keep = np.flatnonzero(sums['shots'] >= min_shots)
+    n_groups = len(keep)
+    values = sums[sort][keep]
+    keep = keep[np.argsort(-values if order == 'desc' else values, kind='stable')[:limit]]
+
+    group_codes = np.unravel_index(groups[keep], shape)
+    rows = []
+    for i, g in enumerate(keep):
+        row = {param: _label(cube, dim, group_codes[j][i] - 1) for j, (param, dim) in enumerate(zip(by, dims))}
+        row.update(_measures(sums['shots'][g], sums['goals'][g], sums['xg'][g]))
+        rows.append(row)
+    return {'total': total, 'groups': n_groups, 'rows': rows}
+
+
+def _label(cube, dim, code):
+    return cube['labels'][dim][code] if code >= 0 else None
+
+
+def _measures(shots, goals, xg):
+    return {'shots': int(shots), 'goals': int(goals), 'xg': round(float(xg), 3),
+            'goals_minus_xg': round(float(goals - xg), 3)}
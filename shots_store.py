@@ -0,0 +1,249 @@
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import render_cache
+import shots_transform
+
+# Компактное колоночное хранилище бросков.
+# Сырые CSV (xg_prediction*.csv) один раз конвертируются в .npz: категориальные столбцы
+# хранятся кодами + словарём, координаты и xG — float32, голы — bool.
+# Воркер при старте читает только .npz, без pd.read_csv и построчных apply.
+SHOTS_CSV = [os.path.join('static', 'csv', 'xg_prediction.csv'),
+             os.path.join('static', 'csv', 'xg_prediction25.csv')]
+STORE_PATH = os.path.join('static', 'csv', 'shots.npz')
+# Новые игры приходят отдельными CSV (схема xg_prediction25.csv) в GAMES_DIR и дописываются
+# в хранилище shots_ingest.py; INGESTED_PATH — журнал уже догруженных файлов
+GAMES_DIR = os.path.join('static', 'csv', 'games')
+INGESTED_PATH = os.path.join(GAMES_DIR, 'ingested.json')
+# Необязательные поправки координат по аренам: {команда-хозяин: [dx, dy] в метрах}
+# (см. shots_transform.rink_coordinates); применяются при загрузке, хранилище не пересобирается
+CALIBRATION_PATH = os.path.join('static', 'csv', 'rink_calibration.json')
+# Все файлы, от которых зависит датасет: по ним строятся ключи кэша картинок
+SOURCES = SHOTS_CSV + [INGESTED_PATH, CALIBRATION_PATH]
+# Версия формата/логики сборки: при изменении хранилище пересобирается даже при тех же CSV
+STORE_VERSION = 3
+
+COLUMNS = ['player_name', 'game', 'team', 'x', 'y', 'goal', 'team2', 'stage', 'home', 'pos', 'format', 'time',
+           'pred_proba', 'season']
+# Координаты на площадке (м), которые load() добавляет к COLUMNS; по ним рисуются все карты
+RINK_COLUMNS = ['x_rink', 'y_rink']
+CATEGORICAL = ['player_name', 'game', 'team', 'team2', 'stage', 'pos', 'format', 'season']
+FLOAT32 = ['x', 'y', 'pred_proba']
+
+
+def read_csv_sources(sources=SHOTS_CSV):
+    """
+    Читает сырые CSV бросков и выводит служебные столбцы format/pos/season.
+
+    Returns:
+        pd.DataFrame: Склеенный датасет со столбцами COLUMNS.
+    """
+    df = pd.concat([pd.read_csv(path, index_col=0) for path in sources])
+    df.reset_index(inplace=True)
+    df = shots_transform.derive_columns(df)
+    # home есть не во всех сезонах: в файлах по схеме xg_prediction25.csv столбца нет
+    return df.reindex(columns=COLUMNS)
+
+
+def ingested(path=INGESTED_PATH):
+    """
+    Журнал догруженных файлов игр.
+
+    Returns:
+        list: [{'file': имя файла в GAMES_DIR, 'games': [id игр], 'rows': добавлено строк}]
+              в порядке загрузки.
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def calibration(path=CALIBRATION_PATH):
+    """
+    Поправки координат по аренам.
+
+    Returns:
+        dict: {команда-хозяин: [dx, dy] в метрах}; пустой, если файла нет.
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def read_games(paths, known):
+    """
+    Читает файлы игр (схема xg_prediction25.csv) и отбрасывает игры, которые уже есть
+    в датасете или встретились в предыдущих файлах: повторно присланная игра не дублируется.
+
+    Args:
+        paths (list): Пути к CSV игр.
+        known (set): id уже известных игр (столбец game); дополняется новыми.
+
+    Returns:
+        list: [(путь, pd.DataFrame только новых строк)] в порядке paths.
+    """
+    parts = []
+    for path in paths:
+        df = read_csv_sources([path])
+        df = df[~df['game'].astype(str).isin(known)]
+        known.update(df['game'].astype(str).unique())
+        parts.append((path, df))
+    return parts
+
+
+def sources_stamp(sources=SHOTS_CSV):
+    """Отпечаток исходных CSV: по нему хранилище понимает, что его пора пересобрать."""
+    stamp = {os.path.basename(p): render_cache.file_stamp(p) for p in sources}
+    stamp['__version__'] = STORE_VERSION
+    return json.dumps(stamp, sort_keys=True)
+
+
+def _encode(df, categories=None):
+    """
+    Кодирует датасет в массивы хранилища.
+
+    Args:
+        df (pd.DataFrame): Датасет со столбцами COLUMNS.
+        categories (dict | None): Уже сохранённые словари категориальных столбцов: коды строятся
+            по ним, а новые значения дописываются в конец словаря. None — словари строятся заново.
+
+    Returns:
+        dict: {имя массива: np.ndarray}.
+    """
+    arrays = {}
+    for col in CATEGORICAL:
+        values = df[col].astype(str)
+        if categories is None:
+            cat = values.astype('category')
+            arrays[f'{col}__codes'] = cat.cat.codes.to_numpy(dtype=np.int32)
+            arrays[f'{col}__categories'] = np.array(cat.cat.categories, dtype=str)
+        else:
+            known = categories[col]
+            extra = pd.Index(values.unique()).difference(pd.Index(known))
+            merged = np.concatenate([known, np.array(extra, dtype=str)])
+            arrays[f'{col}__codes'] = pd.Index(merged).get_indexer(values).astype(np.int32)
+            arrays[f'{col}__categories'] = merged
+    for col in FLOAT32:
+        arrays[col] = df[col].to_numpy(dtype=np.float32)
+    arrays['goal'] = df['goal'].fillna(False).to_numpy(dtype=bool)
+    arrays['time'] = df['time'].to_numpy(dtype=np.int32)
+    # home есть не во всех сезонах: 1/0, -1 — неизвестно
+    home = df['home'].map({True: 1, False: 0, 'True': 1, 'False': 0})
+    arrays['home'] = home.fillna(-1).to_numpy(dtype=np.int8)
+    return arrays
+
+
+def _save(arrays, path):
+    # Пишем атомарно, чтобы параллельно стартующий воркер не прочитал половину файла
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def build(sources=SHOTS_CSV, path=STORE_PATH):
+    """
+    Конвертирует сырые CSV в колоночное хранилище .npz.
+    Игры, догруженные ранее из GAMES_DIR (см. ingested), добавляются после CSV сезонов.
+
+    Args:
+        sources (list): Пути к xg_prediction*.csv.
+        path (str): Куда сохранить хранилище.
+
+    Returns:
+        str: Путь к сохранённому файлу.
+    """
+    df = read_csv_sources(sources)
+    files = [os.path.join(GAMES_DIR, entry['file']) for entry in ingested()]
+    parts = [part for _, part in read_games(files, set(df['game'].astype(str)))]
+    games = [game for part in parts for game in part['game'].astype(str).unique()]
+    if parts:
+        df = pd.concat([df, *parts], ignore_index=True)
+
+    arrays = _encode(df)
+    arrays['__stamp__'] = np.array(sources_stamp(sources))
+    arrays['__games__'] = np.array(json.dumps(games, ensure_ascii=False))
+    _save(arrays, path)
+    return path
+
+
+def append(df, path=STORE_PATH):
+    """
+    Дописывает новые строки в конец хранилища без пересборки из CSV.
+    Коды уже сохранённых строк не меняются (новые значения категорий идут в конец словарей),
+    поэтому индекс и сетки плотности по старым строкам остаются верными.
+
+    Args:
+        df (pd.DataFrame): Новые строки со столбцами COLUMNS (см. read_csv_sources).
+        path (str): Хранилище.
+
+    Returns:
+        int: Число строк до дописывания — номер первой новой строки.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        stored = {name: data[name] for name in data.files}
+    start = len(stored['time'])
+    arrays = _encode(df, {col: stored[f'{col}__categories'] for col in CATEGORICAL})
+    for name, array in arrays.items():
+        stored[name] = array if name.endswith('__categories') else np.concatenate([stored[name], array])
+    games = json.loads(str(stored['__games__'])) + list(df['game'].astype(str).unique())
+    stored['__games__'] = np.array(json.dumps(games, ensure_ascii=False))
+    _save(stored, path)
+    return start
+
+
+def version(path=STORE_PATH):
+    """Версия данных в хранилище: меняется при пересборке из CSV и при каждом дописывании игр."""
+    with np.load(path, allow_pickle=False) as data:
+        raw = f"{data['__stamp__']}|{data['__games__']}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def load(path=STORE_PATH, sources=SHOTS_CSV):
+    """
+    Загружает датасет бросков из колоночного хранилища.
+    Если хранилища нет или исходные CSV изменились, сначала пересобирает его.
+
+    Returns:
+        pd.DataFrame: Датасет с категориальными столбцами, float32 координатами и bool голами,
+                      а также координатами площадки RINK_COLUMNS с поправками calibration().
+    """
+    if not os.path.exists(path) or _stored_stamp(path) != sources_stamp(sources):
+        build(sources, path)
+
+    with np.load(path, allow_pickle=False) as data:
+        columns = {}
+        for col in COLUMNS:
+            if col in CATEGORICAL:
+                columns[col] = pd.Categorical.from_codes(data[f'{col}__codes'], categories=data[f'{col}__categories'])
+            elif col == 'home':
+                home = data['home']
+                columns[col] = pd.array(np.where(home < 0, None, home == 1), dtype='boolean')
+            else:
+                columns[col] = data[col]
+    df = pd.DataFrame(columns)
+    df['x_rink'], df['y_rink'] = shots_transform.rink_coordinates(df, calibration())
+    return df
+
+
+def _stored_stamp(path):
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            return str(data['__stamp__'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+if __name__ == '__main__':
+    # python shots_store.py — пересобрать хранилище из CSV
+    out = build(sys.argv[1:] or SHOTS_CSV)
+    print(f'{out}: {os.path.getsize(out) / 1024:.0f} KB')
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+# Векторные преобразования сырых столбцов датасета бросков в служебные format/pos/season.
+# Вместо df.apply(..., axis=1) по строкам — np.select по целым массивам и
+# преобразование только уникальных значений для категорий.
+FORMATS = ['EV', 'PP', 'PK']
+POSITIONS = ['н', 'з']
+# Исходные координаты бросков — квадрат 500 × 500 на половину площадки IIHF 30 × 30 м:
+# x растёт от лицевого борта атакуемой зоны к центральной линии, y — поперёк площадки.
+# На площадке (м) x отсчитывается от центральной линии к воротам, y — от продольной оси.
+SOURCE_SIZE = 500.0
+RINK_HALF_LENGTH = 30.0
+RINK_WIDTH = 30.0
+
+
+def _as_bool(series):
+    # В CSV флаги бывают как bool, так и строками 'True'/'False'; пропуски считаем False
+    if series.dtype == bool:
+        return series.to_numpy()
+    return series.map({True: True, False: False, 'True': True, 'False': False}).fillna(False).to_numpy(dtype=bool)
+
+
+def derive_format(format_pp, format_pk):
+    """
+    Формат игры из one-hot столбцов: PP (большинство), PK (меньшинство), иначе EV.
+
+    Args:
+        format_pp (pd.Series): Столбец format_PP.
+        format_pk (pd.Series): Столбец format_PK.
+
+    Returns:
+        pd.Categorical: Значения из FORMATS.
+    """
+    codes = np.select([_as_bool(format_pp), _as_bool(format_pk)], [1, 2], default=0)
+    return pd.Categorical.from_codes(codes, categories=FORMATS)
+
+
+def derive_pos(pos_n):
+    """Позиция из столбца pos_н: 'н' — нападающий, 'з' — защитник."""
+    codes = np.where(_as_bool(pos_n), 0, 1)
+    return pd.Categorical.from_codes(codes, categories=POSITIONS)
+
+
+def derive_season(season):
+    """
+    Год сезона из строк вида '2026_Regular_season' -> '2026'.
+    Строки режутся только для уникальных значений, поэтому новые сезоны
+    подхватываются без изменений кода и без прохода по каждой строке.
+    """
+    codes, uniques = pd.factorize(season.astype(str), sort=True)
+    years = pd.Index([value[:4] for value in uniques])
+    categories = years.unique().sort_values()
+    return pd.Categorical.from_codes(categories.get_indexer(years)[codes], categories=categories)
+
+
+def derive_columns(df):
+    """
+    Добавляет в датасет столбцы format, pos и season.
+
+    Args:
+        df (pd.DataFrame): Склеенные сырые CSV с format_PP, format_PK, pos_н, season.
+
+    Returns:
+        pd.DataFrame: Тот же DataFrame с добавленными столбцами.
+    """
+    df['format'] = derive_format(df['format_PP'], df['format_PK'])
+    df['pos'] = derive_pos(df['pos_н'])
+    df['season'] = derive_season(df['season'])
+    return df
+
+
+def rink_coordinates(df, calibration=None):
+    """
+    Координаты бросков на площадке IIHF в метрах — одно преобразование для всех карт.
+
+    Args:
+        df (pd.DataFrame): Датасет с x, y, категориальными team, team2 и home (boolean).
+        calibration (dict | None): {арена — команда-хозяин: [dx, dy] в метрах} — сдвиг
+            разметки в конкретной арене. Броски, у которых хозяин неизвестен
+            (сезоны без home), не сдвигаются.
+
+    Returns:
+        tuple: (x_rink, y_rink) — массивы float32.
+    """
+    scale_x = RINK_HALF_LENGTH / SOURCE_SIZE
+    scale_y = RINK_WIDTH / SOURCE_SIZE
+    x_rink = (SOURCE_SIZE - df['x'].to_numpy(dtype=np.float32)) * np.float32(scale_x)
+    y_rink = (SOURCE_SIZE / 2 - df['y'].to_numpy(dtype=np.float32)) * np.float32(scale_y)
+    if calibration:
+        home = df['home'].astype('boolean')
+        at_home = home.fillna(False).to_numpy(dtype=bool)   # арена — своей команды (team)
+        away = (~home).fillna(False).to_numpy(dtype=bool)   # арена — соперника (team2)
+        for axis, coords in enumerate((x_rink, y_rink)):
+            coords += np.where(at_home, _arena_offsets(df['team'], calibration, axis), 0)
+            coords += np.where(away, _arena_offsets(df['team2'], calibration, axis), 0)
+    return x_rink.astype(np.float32, copy=False), y_rink.astype(np.float32, copy=False)
+
+
+def _arena_offsets(teams, calibration, axis):
+    # Сдвиг берётся по словарю категорий, а не по строкам; последний элемент — для пропусков (код -1)
+    offsets = [calibration.get(str(team), (0.0, 0.0))[axis] for team in teams.cat.categories] + [0.0]
+    return np.asarray(offsets, dtype=np.float32)[teams.cat.codes.to_numpy()]
@@ -0,0 +1,100 @@
+import numpy as np
+
+import shots_density
+
+# Карта зон бросков.
+# Правая половина площадки делится на крупные прямоугольные зоны, броски раскладываются по ним
+# одной гистограммой np.histogram2d (число бросков, голов и сумма xG), и каждая зона
+# закрашивается выбранным показателем. Картинка состоит из одной сетки и подписей зон,
+# поэтому время отрисовки зависит от числа зон, а не от числа бросков, как у точечной карты.
+X_RANGE = shots_density.X_RANGE
+Y_RANGE = shots_density.Y_RANGE
+NX, NY = 10, 8  # зоны 3 × 4 м
+X_EDGES = np.linspace(*X_RANGE, NX + 1)
+Y_EDGES = np.linspace(*Y_RANGE, NY + 1)
+MIN_SHOTS = 10  # по зоне с меньшим числом бросков проценты не считаются
+
+# Тип карты на странице /shots -> (показатель, подпись шкалы, цветовая схема)
+METRICS = {
+    'Броски': ('shots', 'Бросков в зоне', 'RdPu'),
+    'Голы': ('goal_rate', 'Реализация, %', 'YlOrRd'),
+    'xG': ('mean_xg', 'Средний xG, %', 'YlOrRd'),
+    'Голы − xG': ('goal_rate_minus_xg', 'Реализация − xG, п.п.', 'RdBu_r'),
+}
+
+
+def histogram(x, y, goals, xg):
+    """
+    Раскладывает броски по зонам.
+
+    Args:
+        x (np.ndarray): Координаты по длине площадки, м.
+        y (np.ndarray): Координаты по ширине площадки, м.
+        goals (np.ndarray): Признак гола (bool).
+        xg (np.ndarray): pred_proba бросков.
+
+    Returns:
+        dict: 'shots', 'goals', 'xg' — массивы формы (NY, NX).
+    """
+    def hist(weights=None):
+        counts, _, _ = np.histogram2d(y, x, bins=[Y_EDGES, X_EDGES], weights=weights)
+        return counts
+
+    return {'shots': hist(), 'goals': hist(np.asarray(goals, dtype=np.float64)),
+            'xg': hist(np.asarray(xg, dtype=np.float64))}
+
+
+def metric(zones, name):
+    """
+    Значения показателя по зонам.
+
+    Args:
+        zones (dict): Результат histogram().
+        name (str): 'shots', 'goal_rate', 'mean_xg' или 'goal_rate_minus_xg' (проценты).
+
+    Returns:
+        np.ma.MaskedArray: Форма (NY, NX); зоны без бросков (для процентов — меньше MIN_SHOTS) скрыты.
+    """
+    shots = zones['shots']
+    if name == 'shots':
+        return np.ma.masked_less(shots, 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        goal_rate = zones['goals'] / shots * 100
+        mean_xg = zones['xg'] / shots * 100
+    values = {'goal_rate': goal_rate, 'mean_xg': mean_xg, 'goal_rate_minus_xg': goal_rate - mean_xg}[name]
+    return np.ma.masked_where(shots < MIN_SHOTS, values)
+
+
+def draw(ax, zones, map_type, clip_path=None, **mesh_kws):
+    """
+    Закрашивает зоны показателем для типа карты и подписывает в зонах, где бросков не меньше
+    MIN_SHOTS, реализацию против ожидаемой: «голы % / xG %».
+    clip_path — контур бортов в координатах площадки (matplotlib.path.Path): заливка обрезается
+    по нему, а зоны с центром за бортом (в скруглённых углах) не подписываются.
+
+    Returns:
+        tuple: (QuadMesh для colorbar, подпись шкалы).
+    """
+    name, label, cmap = METRICS[map_type]
+    values = metric(zones, name)
+    if name == 'goal_rate_minus_xg':
+        # Шкала симметрична относительно нуля: лучше ожидаемого — красное, хуже — синее
+        limit = max(float(np.abs(values).max()) if values.count() else 0.0, 1.0)
+        mesh_kws.setdefault('vmin', -limit)
+        mesh_kws.setdefault('vmax', limit)
+    mesh = ax.pcolormesh(X_EDGES, Y_EDGES, values, cmap=cmap, **mesh_kws)
+    if clip_path is not None:
+        # Зоны прямоугольные, а углы площадки скруглены: без обрезки заливка выходит за борт
+        mesh.set_clip_path(clip_path, ax.transData)
+
+    shots = zones['shots']
+    x_centers = (X_EDGES[:-1] + X_EDGES[1:]) / 2
+    y_centers = (Y_EDGES[:-1] + Y_EDGES[1:]) / 2
+    for iy, ix in zip(*np.nonzero(shots >= MIN_SHOTS)):
+        if clip_path is not None and not clip_path.contains_point((x_centers[ix], y_centers[iy])):
+            continue
+        goal_rate = zones['goals'][iy, ix] / shots[iy, ix] * 100
+        mean_xg = zones['xg'][iy, ix] / shots[iy, ix] * 100
+        ax.text(x_centers[ix], y_centers[iy], f'{goal_rate:.0f}/{mean_xg:.0f}',
+                ha='center', va='center', fontsize=7, zorder=mesh.get_zorder() + 1)
+    return mesh, label